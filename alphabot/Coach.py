@@ -1,12 +1,12 @@
 from collections import deque
 from Arena import Arena
+from League import League
 from MCTS import MCTS
 import numpy as np
-from utils import Bar, AverageMeter
-import time, os, sys
+from utils import Bar, AverageMeter, aggregateExamples, compressPolicy, compressState, denseExample, exampleNBytes
+import re, time, os, sys
 from pickle import Pickler, Unpickler
 from random import shuffle
-import elopy
 
 
 class Coach:
@@ -23,6 +23,8 @@ class Coach:
         self.trainExamplesHistory = []    # history of examples from args.numItersForTrainExamplesHistory latest iterations
         self.skipFirstSelfPlay = False # can be overriden in loadTrainExamples()
         self.best_elo = ['1000']
+        # results of every game between checkpoints, kept when resuming training
+        self.league = League(self.game, self.args, resume=self.args.load_model)
 
     def executeEpisode(self, iteration):
         """
@@ -39,6 +41,8 @@ class Coach:
             trainExamples: a list of examples of the form (state,pi,v)
                            pi is the MCTS informed policy vector, v is +1 if
                            the player eventually won the game, else -1.
+                           state and pi are stored in the compact format of
+                           utils.examples (int16 state, sparse float16 pi).
         """
         trainExamples = []
         current_game = self.game.getInitGame()
@@ -57,11 +61,9 @@ class Coach:
 
             pi = self.mcts.getActionProb(state, temp=temp)
             pi_reshape = np.reshape(pi, (21, 18))
-            # sym = self.game.getSymmetries(state, pi)
+            # hand-order symmetries are generated per batch in NNetWrapper.train
             s = self.game.getState()
-            trainExamples.append([s, self.curPlayer, pi, None])
-            # for b,p in sym:
-            #     trainExamples.append([b, self.curPlayer, p, None])
+            trainExamples.append([compressState(s), self.curPlayer, compressPolicy(pi), None])
             action = np.random.choice(len(pi), p=pi)
             a, b = np.unravel_index(np.ravel(action, np.asarray(pi).shape), pi_reshape.shape)
             current_game, self.curPlayer = self.game.getNextState(self.curPlayer, (a[0], b[0]))
@@ -79,13 +81,16 @@ class Coach:
         iteration. After every iteration, it retrains neural network with
         examples in trainExamples (which has a maximium length of maxlenofQueue).
         It then pits the new neural network against the old one and accepts it
-        only if it wins >= updateThreshold fraction of games.
+        only if it wins >= updateThreshold fraction of games. Every candidate
+        is saved as a checkpoint and rated in self.league against all others.
         """
-        
+        best, lastIter = self.joinLeague()
 
         for i in range(1, self.args.numIters+1):
+            # checkpoints are numbered on from the league's last one
+            iteration = lastIter + i
             # bookkeeping
-            print('------ITER ' + str(i) + '------')
+            print('------ITER ' + str(iteration) + '------')
             # examples of the iteration
             if not self.skipFirstSelfPlay or i>1:
                 iterationTrainExamples = deque([], maxlen=self.args.maxlenOfQueue)
@@ -96,7 +101,7 @@ class Coach:
     
                 for eps in range(self.args.numEps):
                     self.mcts = MCTS(self.game, self.nnet, self.args)   # reset search tree
-                    iterationTrainExamples += self.executeEpisode(i)
+                    iterationTrainExamples += self.executeEpisode(iteration)
                     # print(iterationTrainExamples)
                     # bookkeeping + plot progress
                     eps_time.update(time.time() - end)
@@ -105,6 +110,11 @@ class Coach:
                                                                                                                total=bar.elapsed_td, eta=bar.eta_td)
                     bar.next()
                 bar.finish()
+                if iterationTrainExamples:
+                    compactBytes = np.mean([exampleNBytes(e) for e in iterationTrainExamples])
+                    denseBytes = np.mean([exampleNBytes(denseExample(e)) for e in iterationTrainExamples])
+                    print('Example memory: ~%d bytes/example, ~%d bytes/example before compression (%.1fx)'
+                          % (compactBytes, denseBytes, denseBytes / compactBytes))
 
                 # save the iteration examples to the history 
                 self.trainExamplesHistory.append(iterationTrainExamples)
@@ -113,13 +123,16 @@ class Coach:
                 print("len(trainExamplesHistory) =", len(self.trainExamplesHistory), " => remove the oldest trainExamples")
                 self.trainExamplesHistory.pop(0)
             # backup history to a file
-            # NB! the examples were collected using the model from the previous iteration, so (i-1)  
-            self.saveTrainExamples(i-1)
+            # NB! the examples were collected using the model from the previous iteration, so (iteration-1)  
+            self.saveTrainExamples(iteration-1)
             
-            # shuffle examlpes before training
+            # merge repeated positions into weighted examples, then shuffle before training
             trainExamples = []
             for e in self.trainExamplesHistory:
                 trainExamples.extend(e)
+            numExamples = len(trainExamples)
+            trainExamples, dedupRatio = aggregateExamples(trainExamples)
+            print('Aggregated %d examples into %d unique states (dedup ratio %.3f)' % (numExamples, len(trainExamples), dedupRatio))
             shuffle(trainExamples)
 
             # training new network, keeping a copy of the old one
@@ -137,27 +150,29 @@ class Coach:
                           lambda x: nmcts.getActionProb(x, temp=0), self.game)
             pwins, nwins, draws = arena.playGames(self.args.arenaCompare)
             
-            ########## Elo Rating  ##########
-            imp_elo = elopy.Implementation()
-            imp_elo.addPlayer("Past",rating = float(self.best_elo[-1]))
-            imp_elo.addPlayer("New",rating = 900)
-            for time_stamp in range(pwins):
-                imp_elo.recordMatch("Past","New",winner = "Past")
-            for time_stamp in range(nwins):
-                imp_elo.recordMatch("Past","New",winner = "New")
-            for time_stamp in range(draws):
-                imp_elo.recordMatch("Past","New",draw = True)
-            self.best_elo.append(str(max(map(lambda x: x[1], imp_elo.getRatingList()[:2]))))           
-            
-            
+            ########## League Rating ##########
+            new = self.getCheckpointFile(iteration)
+            self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=new)
+            self.league.recordMatch(best, new, pwins, nwins, draws)
+            # play the new model against the most recent other checkpoints as well
+            opponents = [name for name in self.league.names if name not in (best, new)]
+            if self.args.leagueGames and self.args.leagueOpponents:
+                self.league.scheduleGames(new, opponents[-self.args.leagueOpponents:], self.args.leagueGames)
+
             print('NEW/PREV WINS : %d / %d ; DRAWS : %d' % (nwins, pwins, draws))
             if pwins+nwins > 0 and float(nwins)/(pwins+nwins) < self.args.updateThreshold:
                 print('REJECTING NEW MODEL')
                 self.nnet.load_checkpoint(folder=self.args.checkpoint, filename='temp.pth.tar')
             else:
                 print('ACCEPTING NEW MODEL')
-                self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=self.getCheckpointFile(i))
+                best = new
                 self.nnet.save_checkpoint(folder=self.args.checkpoint, filename='best.pth.tar') 
+
+            self.league.fitRatings()
+            self.league.save()
+            self.best_elo.append(str(self.league.getRating(best)))
+            for name, rating in self.league.getRatingList()[:5]:
+                print('%s: %.1f' % (name, rating))
          
         ####### Record Elo Rating #########
         file = open("Elo.txt","w")
@@ -165,9 +180,38 @@ class Coach:
         file.close()
         
         
+    def joinLeague(self):
+        """
+        Adds the network about to be trained to the league, unless it is one of
+        its checkpoints already.
+
+        Returns:
+            best: the name the network is rated under
+            lastIter: the number of the league's last checkpoint
+        """
+        iterations = [self.getCheckpointIteration(name) for name in self.league.names]
+        lastIter = max([i for i in iterations if i is not None], default=-1)
+        if self.args.load_model:
+            folder, filename = self.args.load_folder_file
+            if os.path.abspath(folder) == os.path.abspath(self.args.checkpoint) and filename in self.league:
+                return filename, lastIter
+        # rate the starting (or loaded) network as well, so new models have something to play
+        lastIter += 1
+        best = self.getCheckpointFile(lastIter)
+        self.nnet.save_checkpoint(folder=self.args.checkpoint, filename=best)
+        self.league.addPlayer(best)
+        return best, lastIter
+
     def getCheckpointFile(self, iteration):
         return 'checkpoint_' + str(iteration) + '.pth.tar'
 
+    def getCheckpointIteration(self, filename):
+        """
+        Returns the iteration of a getCheckpointFile() name, None for other names.
+        """
+        match = re.match(r'checkpoint_(\d+)\.pth\.tar$', filename)
+        return int(match.group(1)) if match else None
+
     def saveTrainExamples(self, iteration):
         folder = self.args.checkpoint
         if not os.path.exists(folder):
@@ -5,10 +5,10 @@ import pickle
 from fireplace import cards
 from fireplace.exceptions import GameOver, InvalidAction
 from fireplace.game import Game
-from fireplace.player import Player
+from fireplace.player import LegalAction, Player
 from fireplace.utils import random_draft
 from hearthstone.enums import CardClass
-from utils import UnhandledAction
+from utils import UnhandledAction, permuteHands
 from fireplace.exceptions import GameOver
 
 class YEET:
@@ -16,19 +16,25 @@ class YEET:
     Use 1 for player1 and -1 for player2.
     21 possible actions per move, and 8 possible targets per action + 1 if no targets
     is_basic = True initializes game between priest and rogue only
+    use_templates = True copies the starting cards of games with the same decks
+    instead of creating them again (see fireplace's GameTemplate)
     """
 
-    def __init__(self, is_basic=True):
+    def __init__(self, is_basic=True, seed=None, use_templates=False):
         self.game = None
         self.is_basic = True
         self.players = ['player1', 'player2']
         self.is_basic = is_basic
         self.isolate = False
+        # draws the decks and game seeds, so a seeded YEET replays the same games
+        self.random = random.Random(seed)
+        self.use_templates = use_templates
 
 
     def isolateSet(self, filename='notbasicset', set='CardSet.CORE'):
         # isolates the specified card set for exclusion in drafting
-        cards.db.initialize()
+        if not cards.db.initialized:
+            cards.db.initialize()
         extraset = []
         for index, card in cards.db.items():
             if str(card.card_set) != set:
@@ -47,27 +53,29 @@ class YEET:
         if self.isolate:
             self.isolateSet()
 
-        cards.db.initialize()
+        if not cards.db.initialized:
+            cards.db.initialize()
         if self.is_basic: #create quick simple game
             with open('notbasic.data', 'rb') as f:
                 extra_set = pickle.load(f)
             p1 = 6 #priest
             p2 = 7 #rogue
-            deck1 = random_draft(CardClass(p1), exclude=extra_set)
-            deck2 = random_draft(CardClass(p2), exclude=extra_set)
+            deck1 = random_draft(CardClass(p1), exclude=extra_set, rng=self.random)
+            deck2 = random_draft(CardClass(p2), exclude=extra_set, rng=self.random)
         else:
-            p1 = random.randint(1, 9)
-            p2 = random.randint(1, 9)
-            deck1 = random_draft(CardClass(p1))
-            deck2 = random_draft(CardClass(p2))
+            p1 = self.random.randint(1, 9)
+            p2 = self.random.randint(1, 9)
+            deck1 = random_draft(CardClass(p1), rng=self.random)
+            deck2 = random_draft(CardClass(p2), rng=self.random)
         self.players[0] = Player("Player1", deck1, CardClass(p1).default_hero)
         self.players[1] = Player("Player2", deck2, CardClass(p2).default_hero)
-        game = Game(players=self.players)
+        game = Game(players=self.players, seed=self.random.getrandbits(64), simulation=True)
+        game.use_templates = self.use_templates
         game.start()
 
         # Skip mulligan for now
         for player in game.players:
-            cards_to_mulligan = random.sample(player.choice.cards, 0)
+            cards_to_mulligan = game.random.sample(player.choice.cards, 0)
             player.choice.choose(*cards_to_mulligan)
 
         game.player_to_start = game.current_player
@@ -118,41 +126,30 @@ class YEET:
         
         actions = np.zeros((21,18))
         player = game_instance.current_player
-        #If the player is being given a choice, return only valid choices
-        if player.choice:
-            for index, card in enumerate(player.choice.cards):
-                actions[20, index] = 1
-
-        else:
-            # add cards in hand
-            for index, card in enumerate(player.hand):
-                if card.is_playable():
-                    if card.requires_target():
-                        for target, card in enumerate(card.targets):
-                            actions[index, target] = 1
-                    elif card.must_choose_one:
-                        for choice, card in enumerate(card.choose_cards):
-                            actions[index, choice] = 1
-                    else:
-                        actions[index] = 1
-            # add targets available to minions that can attack
-            for position, minion in enumerate(player.field):
-                if minion.can_attack():
-                    for target, card in enumerate(minion.attack_targets):
-                        actions[position+10, target] = 1
-            # add hero power and targets if applicable
-            if player.hero.power.is_usable():
-                if player.hero.power.requires_target():
-                    for target, card in enumerate(player.hero.power.targets):
-                        actions[17, target] = 1
+        for action in player.legal_actions():
+            targets = slice(len(action.targets))
+            if action.type == LegalAction.Type.CHOOSE:
+                #If the player is being given a choice, only choices are valid
+                actions[20, action.index] = 1
+            elif action.type == LegalAction.Type.PLAY:
+                # cards in hand, with their targets or choose one choice
+                if action.targets:
+                    actions[action.index, targets] = 1
+                elif action.choice is not None:
+                    actions[action.index, action.choice] = 1
+                else:
+                    actions[action.index] = 1
+            elif action.type == LegalAction.Type.ATTACK:
+                # minions that can attack use rows 10-16, the hero row 18
+                row = 18 if action.index is None else action.index + 10
+                actions[row, targets] = 1
+            elif action.type == LegalAction.Type.HERO_POWER:
+                if action.targets:
+                    actions[17, targets] = 1
                 else:
                     actions[17] = 1
-            # add hero attacking if applicable
-            if player.hero.can_attack():
-                for target, card in enumerate(player.hero.attack_targets):
-                    actions[18, target] = 1
-            # add end turn
-            actions[19,1] = 1
+            elif action.type == LegalAction.Type.END_TURN:
+                actions[19,1] = 1
         return actions
 
 
@@ -342,30 +339,23 @@ class YEET:
         return s
 
 
-    def getSymmetries(self, state, pi):
+    def getSymmetries(self, state, pi, count=7):
         """
         Input:
             state: current state
-            pi: policy vector of size self.getActionSize()
+            pi: policy vector of size 21*18
+            count: number of random hand orderings to generate
 
         Returns:
-            symmForms: a list of [(actions,pi)] where each tuple is a symmetrical
-                       form of the actions and the corresponding pi vector. This
-                       is used when training the neural network from examples.
+            symmForms: a list of [(state,pi)] where each tuple is a symmetrical
+                       form of the state and the corresponding pi vector, the
+                       first one being the input itself. This is used when
+                       training the neural network from examples.
         """
-        assert(len(pi) == 168)
-        pi_reshape = np.reshape(pi, (21, 9))
-        l = []
-
-        for i in range(1, 5):
-            for j in [True, False]:
-                newS = np.rot90(state, i)
-                newPi = np.rot90(pi_reshape, i)
-                if j:
-                    newS = np.fliplr(newS)
-                    newPi = np.fliplr(newPi)
-                l += [(newS, list(newPi.ravel()) + [pi[-1]])]
-        return l
+        states = np.repeat(np.asarray(state)[None], count, axis=0)
+        pis = np.repeat(np.asarray(pi, dtype=np.float32)[None], count, axis=0)
+        states, pis = permuteHands(states, pis)
+        return [(state, pi)] + list(zip(states, pis))
 
 
     def stringRepresentation(self, state):
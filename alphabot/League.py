@@ -0,0 +1,161 @@
+import logging
+import multiprocessing
+import os
+import numpy as np
+from utils import dotdict
+
+
+def playMatch(job):
+    """
+    Plays one match between two checkpoints. Runs in a worker process, so the
+    game, networks and searches are all built from scratch here.
+
+    Input:
+        job: (name1, name2, folder, numGames, mcts_args, is_basic)
+
+    Returns:
+        name1, name2, wins of name1, wins of name2, draws
+    """
+    from Arena import Arena
+    from Game import YEET
+    from MCTS import MCTS
+    from NNet import NNetWrapper
+    from fireplace.logging import simulation_mode
+
+    name1, name2, folder, numGames, mcts_args, is_basic = job
+    logging.disable(logging.WARNING)
+    simulation_mode()
+    mcts_args = dotdict(mcts_args)
+    game = YEET(is_basic=is_basic)
+
+    nnet1 = NNetWrapper(game)
+    nnet1.load_checkpoint(folder=folder, filename=name1)
+    nnet2 = NNetWrapper(game)
+    nnet2.load_checkpoint(folder=folder, filename=name2)
+    mcts1 = MCTS(game, nnet1, mcts_args)
+    mcts2 = MCTS(game, nnet2, mcts_args)
+
+    arena = Arena(lambda x: mcts1.getActionProb(x, temp=0),
+                  lambda x: mcts2.getActionProb(x, temp=0), game)
+    wins1, wins2, draws = arena.playGames(numGames)
+    return name1, name2, wins1, wins2, draws
+
+
+class League():
+    """
+    Keeps the result of every game played between model checkpoints and
+    rates all of them together with a Bradley-Terry model.
+
+    Results are stored in a single table, wins[i, j] being the number of
+    games checkpoint i won against checkpoint j (a draw counts as half a win
+    for each side), so refitting never needs to replay individual games.
+    Ratings are reported on the Elo scale.
+    """
+    def __init__(self, game, args, filename='league.npz', resume=True):
+        """
+        Loads the results saved in args.checkpoint if resume is True, otherwise
+        the league starts empty and replaces them on save().
+        """
+        self.game = game
+        self.args = args
+        self.filename = os.path.join(args.checkpoint, filename)
+        self.names = []
+        self.index = {}
+        self.wins = np.zeros((0, 0))
+        self.strengths = np.ones(0)
+        if resume and os.path.isfile(self.filename):
+            self.load()
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def addPlayer(self, name):
+        if name in self.index:
+            return
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.wins = np.pad(self.wins, ((0, 1), (0, 1)), 'constant')
+        self.strengths = np.append(self.strengths, 1.)
+
+    def recordMatch(self, name1, name2, wins1, wins2, draws=0):
+        """
+        Adds the results of a series of games between two checkpoints.
+        """
+        self.addPlayer(name1)
+        self.addPlayer(name2)
+        i, j = self.index[name1], self.index[name2]
+        self.wins[i, j] += wins1 + 0.5*draws
+        self.wins[j, i] += wins2 + 0.5*draws
+
+    def scheduleGames(self, name, opponents, numGames):
+        """
+        Plays numGames games between checkpoint name and each of opponents,
+        args.leagueWorkers matches at a time, and records the results.
+        """
+        mcts_args = {'numMCTSSims': self.args.numMCTSSims, 'cpuct': self.args.cpuct}
+        jobs = [(name, opponent, self.args.checkpoint, numGames, mcts_args, self.game.is_basic)
+                for opponent in opponents if opponent != name]
+        if not jobs:
+            return
+        workers = min(self.args.leagueWorkers, len(jobs))
+        if workers > 1:
+            # spawn: CUDA cannot be reinitialized in forked children
+            with multiprocessing.get_context('spawn').Pool(workers) as pool:
+                results = pool.map(playMatch, jobs)
+        else:
+            results = [playMatch(job) for job in jobs]
+        for result in results:
+            self.recordMatch(*result)
+
+    def fitRatings(self, prior=1., tol=1e-6, maxIters=1000):
+        """
+        Maximum-likelihood Bradley-Terry strengths for every checkpoint,
+        using the minorization-maximization updates of Hunter (2004):
+            p_i <- W_i / sum_j n_ij / (p_i + p_j)
+        over the whole results table at once. Each checkpoint also gets
+        prior virtual draws against an average (p = 1) opponent, which keeps
+        unbeaten or winless checkpoints finite. The previous fit is used as
+        the starting point, so only a few updates are needed per iteration.
+        """
+        if not self.names:
+            return self.strengths
+        games = self.wins + self.wins.T
+        W = self.wins.sum(axis=1) + 0.5*prior
+        p = self.strengths.copy()
+        for _ in range(maxIters):
+            denom = (games / (p[:, None] + p[None, :])).sum(axis=1) + prior / (p + 1.)
+            new_p = W / denom
+            new_p /= np.exp(np.mean(np.log(new_p)))
+            converged = np.max(np.abs(np.log(new_p) - np.log(p))) < tol
+            p = new_p
+            if converged:
+                break
+        self.strengths = p
+        return p
+
+    def getRating(self, name, base_rating=1000):
+        return base_rating + 400*np.log10(self.strengths[self.index[name]])
+
+    def getRatingList(self, base_rating=1000):
+        """
+        Returns a list of tuples in the form of (name, rating), best first.
+        """
+        ratings = base_rating + 400*np.log10(self.strengths)
+        order = np.argsort(-ratings)
+        return [(self.names[i], float(ratings[i])) for i in order]
+
+    def save(self):
+        folder = os.path.dirname(self.filename)
+        if folder and not os.path.exists(folder):
+            os.makedirs(folder)
+        np.savez(self.filename, names=np.array(self.names), wins=self.wins, strengths=self.strengths)
+
+    def load(self):
+        with np.load(self.filename) as data:
+            self.names = [str(name) for name in data['names']]
+            self.wins = data['wins']
+            self.strengths = data['strengths']
+        self.index = {name: i for i, name in enumerate(self.names)}
@@ -3,7 +3,6 @@ import numpy as np
 import copy
 import random
 from fireplace.exceptions import GameOver, InvalidAction
-import gc
 EPS = 1e-8
 
 class MCTS():
@@ -11,7 +10,7 @@ class MCTS():
     This class handles the MCTS tree.
     """
 
-    def __init__(self, game, nnet, args):
+    def __init__(self, game, nnet, args, seed=None):
         self.game = game
         self.nnet = nnet
         self.args = args
@@ -23,6 +22,7 @@ class MCTS():
 
         self.Es = {}        # stores game.getGameEnded ended for board s
         self.Vs = {}        # stores game.getValidMoves for board s
+        self.random = random.Random(seed)   # seeds the determinizations
 
     def getActionProb(self, state, temp=1):
         """
@@ -52,9 +52,12 @@ class MCTS():
         """ Create a deep clone of this game state, randomizing any information not visible to the specified observer player.
         """
         game_copy = copy.deepcopy(game)
+        # the copy carries on the random state of the game, reseed it so that
+        # every determinization (and what follows in the game) differs
+        game_copy.random.seed(self.random.getrandbits(64))
         enemy = game_copy.current_player.opponent
-        random.shuffle(enemy.hand)
-        random.shuffle(enemy.deck)
+        enemy.shuffle_hand()
+        enemy.shuffle_deck()
         # for idx, card in enumerate(enemy.hand):
         #     if card.id == 'GAME_005':
         #         coin = enemy.hand.pop(idx)
@@ -154,7 +157,7 @@ class MCTS():
         while s not in self.Es and not game_copy.ended: # while state is non-terminal
             try:
                 choices = np.argwhere(self.game.getValidMoves(game_copy))
-                next_s, next_player = self.game.getNextState(1, random.choice(choices), game_copy)
+                next_s, next_player = self.game.getNextState(1, game_copy.random.choice(choices), game_copy)
                 s = self.game.stringRepresentation(next_s)
             except GameOver:   
                 #v = 0.7*v + 0.3*self.game.getGameEnded(game_copy)
@@ -176,6 +179,8 @@ class MCTS():
             else:
                 self.Qsa[(s,a)] = (self.Nsa[(s,a)]*self.Qsa[(s,a)] - v)/(self.Nsa[(s,a)]+1)  
         
-        # Garbage Can
-        gc.collect()
+        # Tear the determinization down so that it is freed right away,
+        # rather than by a full garbage collection
+        if create_copy:
+            game_copy.dispose()
 
@@ -3,7 +3,7 @@ import time
 import numpy as np
 import sys
 sys.path.append('../../')
-from utils import Bar, AverageMeter, dotdict
+from utils import Bar, AverageMeter, PrioritizedSampler, densifyBatch, dotdict, permuteHands, stateKey
 
 import torch
 import torch.optim as optim
@@ -18,11 +18,18 @@ args = dotdict({
     'batch_size': 64,
     'cuda': True,
     'num_channels': 512,
+    'per_priority': 'value_loss',   # 'value_loss', 'entropy' or None for uniform sampling
+    'per_alpha': 0.6,
+    'per_beta': 0.4,                # annealed linearly to 1 over the epochs
+    'augment': True,                # shuffle the hand order of every sampled batch
 })
 
 class NNetWrapper():
     def __init__(self, game):
         self.nnet = nnet(game, args)
+        # raw replay priority of each state of the last train() call, by
+        # stateKey, so that the next calls carry on from them
+        self.statePriorities = {}
 
         if args.cuda:
             self.nnet.cuda()
@@ -30,8 +37,17 @@ class NNetWrapper():
     def train(self, examples):
         """
         examples: list of examples, each example is of form (state, pi, v)
+                  or (state, pi, v, weight) in the compact format of
+                  utils.examples. Losses are weighted by the example weights.
         """
         optimizer = optim.Adam(self.nnet.parameters())
+        sampler = None
+        if args.per_priority and examples:
+            # examples are aggregated and shuffled anew every iteration, so
+            # priorities are kept by state rather than by example id
+            keys = [stateKey(e[0]) for e in examples]
+            priorities = np.array([self.statePriorities.get(key, 1.) for key in keys])
+            sampler = PrioritizedSampler(len(examples), alpha=args.per_alpha, priorities=priorities)
 
         for epoch in range(args.epochs):
             print('EPOCH ::: ' + str(epoch+1))
@@ -46,15 +62,25 @@ class NNetWrapper():
             batch_idx = 0
 
             while batch_idx < int(len(examples)/args.batch_size):
-                sample_ids = np.random.randint(len(examples), size=args.batch_size)
-                states, pis, vs = list(zip(*[examples[i] for i in sample_ids]))
-                states = torch.FloatTensor(np.array(states).astype(np.float64)).unsqueeze(1)
-                target_pis = torch.FloatTensor(np.array(pis))
-                target_vs = torch.FloatTensor(np.array(vs).astype(np.float64))
+                if sampler is None:
+                    sample_ids = np.random.randint(len(examples), size=args.batch_size)
+                    is_weights = 1
+                else:
+                    beta = args.per_beta + (1 - args.per_beta)*epoch/max(1, args.epochs - 1)
+                    sample_ids, is_weights = sampler.sample(args.batch_size, beta)
+                states, pis, vs, weights = densifyBatch([examples[i] for i in sample_ids])
+                weights *= is_weights
+                if args.augment:
+                    states, pis = permuteHands(states, pis)
+                states = torch.from_numpy(states).unsqueeze(1)
+                target_pis = torch.from_numpy(pis)
+                target_vs = torch.from_numpy(vs)
+                weights = torch.from_numpy(weights)
 
                 # predict
                 if args.cuda:
                     states, target_pis, target_vs = states.contiguous().cuda(), target_pis.contiguous().cuda(), target_vs.contiguous().cuda()
+                    weights = weights.contiguous().cuda()
                 states, target_pis, target_vs = Variable(states), Variable(target_pis), Variable(target_vs)
 
                 # measure data loading time
@@ -62,10 +88,14 @@ class NNetWrapper():
 
                 # compute output
                 out_pi, out_v = self.nnet(states)
-                l_pi = self.loss_pi(target_pis, out_pi)
-                l_v = self.loss_v(target_vs, out_v)
+                l_pi = self.loss_pi(target_pis, out_pi, weights)
+                l_v = self.loss_v(target_vs, out_v, weights)
                 total_loss = l_pi + l_v
 
+                if sampler is not None:
+                    priorities[sample_ids] = self.priorities(target_vs, out_pi, out_v)
+                    sampler.update(sample_ids, priorities[sample_ids])
+
                 # record loss
 
                 pi_losses.update(torch.Tensor.item(l_pi.data), states.size(0))
@@ -95,6 +125,9 @@ class NNetWrapper():
                 bar.next()
             bar.finish()
 
+        if sampler is not None:
+            # states which left the training window are dropped
+            self.statePriorities = dict(zip(keys, priorities.tolist()))
 
     def predict(self, state):
         """
@@ -116,12 +149,29 @@ class NNetWrapper():
         #print('PREDICTION TIME TAKEN : {0:03f}'.format(time.time()-start))
         return torch.exp(pi).data.cpu().numpy()[0], v.data.cpu().numpy()[0]
 
-    def loss_pi(self, targets, outputs):
+    def loss_pi(self, targets, outputs, weights=None):
         targets = targets.view(-1, 21, 18)
-        return -torch.sum(targets*outputs)/targets.size()[0]
+        if weights is None:
+            return -torch.sum(targets*outputs)/targets.size()[0]
+        losses = -torch.sum((targets*outputs).view(targets.size()[0], -1), 1)
+        return torch.sum(weights*losses)/torch.sum(weights)
+
+    def loss_v(self, targets, outputs, weights=None):
+        if weights is None:
+            return torch.sum((targets-outputs.view(-1))**2)/targets.size()[0]
+        return torch.sum(weights*(targets-outputs.view(-1))**2)/torch.sum(weights)
 
-    def loss_v(self, targets, outputs):
-        return torch.sum((targets-outputs.view(-1))**2)/targets.size()[0]
+    def priorities(self, target_vs, out_pi, out_v):
+        """
+        Per-example replay priorities for the batch, from the squared value
+        error or from the entropy of the predicted policy (args.per_priority).
+        """
+        with torch.no_grad():
+            if args.per_priority == 'entropy':
+                p = -torch.sum((torch.exp(out_pi)*out_pi).view(out_pi.size()[0], -1), 1)
+            else:
+                p = (target_vs - out_v.view(-1))**2
+        return p.cpu().numpy()
 
     def save_checkpoint(self, folder='checkpoint', filename='checkpoint.pth.tar'):
         filepath = os.path.join(folder, filename)
@@ -3,6 +3,7 @@ from Game import YEET as Game
 from NNet import NNetWrapper as nn
 from utils import dotdict
 import logging
+from fireplace.logging import simulation_mode
 
 args = dotdict({
     'numIters': 10,    #100
@@ -19,11 +20,16 @@ args = dotdict({
     'load_folder_file': ('./temp/','temp.pth.tar'),
     'numItersForTrainExamplesHistory': 20,
 
+    'leagueGames': 2,       # games against each older checkpoint, 0 to only rate vs the previous best
+    'leagueOpponents': 3,   # how many of the most recent older checkpoints to play, 0 for none
+    'leagueWorkers': 3,     # matches played in parallel
+
 })
 
 if __name__=="__main__":
     
     logging.disable(logging.WARNING)
+    simulation_mode()
     
     g = Game(is_basic=True)
     nnet = nn(g)
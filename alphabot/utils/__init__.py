@@ -1,8 +1,11 @@
 """Useful utils
 """
 from .avgmeter import *
+from .examples import *
 from .exceptions import *
 from .gameUtils import *
+from .replay import *
+from .symmetries import *
 from .utils import *
 
 # progress bar
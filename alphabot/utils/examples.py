@@ -0,0 +1,174 @@
+'''Compact storage for self-play training examples.
+
+An example is kept as (state, (action_ids, probs), v) where state is the
+263-long int16 feature vector from YEET.getState, and the policy is stored
+sparsely as uint16 action ids with their float16 probabilities. Examples are
+only densified to float32 arrays when a training batch is assembled.
+
+aggregateExamples merges examples sharing the same state into a single
+(state, policy, v, weight) example, weight being the number of copies.
+'''
+import sys
+
+import numpy as np
+
+__all__ = ['ACTION_SIZE', 'STATE_SIZE', 'aggregateExamples', 'compressExample',
+           'compressPolicy', 'compressState', 'densifyBatch', 'densifyPolicy',
+           'denseExample', 'exampleNBytes', 'stateKey']
+
+STATE_SIZE = 263
+ACTION_SIZE = 21 * 18
+
+
+def compressState(state):
+    """
+    Input:
+        state: a 263 length numpy array of features (see YEET.getState)
+
+    Returns:
+        the same features as an int16 array
+    """
+    return np.asarray(state, dtype=np.int16)
+
+
+def compressPolicy(pi):
+    """
+    Input:
+        pi: a dense policy vector of size ACTION_SIZE
+
+    Returns:
+        (action_ids, probs): uint16 ids of the non-zero entries of pi and
+                             their float16 probabilities
+    """
+    pi = np.asarray(pi, dtype=np.float32).ravel()
+    action_ids = np.flatnonzero(pi).astype(np.uint16)
+    return action_ids, pi[action_ids].astype(np.float16)
+
+
+def compressExample(state, pi, v):
+    return (compressState(state), compressPolicy(pi), v)
+
+
+def densifyPolicy(policy, out=None):
+    """
+    Input:
+        policy: an (action_ids, probs) pair, or a dense policy vector for
+                examples saved before the compact format existed
+        out: optional float32 array of size ACTION_SIZE to write into
+
+    Returns:
+        the dense, renormalized float32 policy vector
+    """
+    if out is None:
+        out = np.zeros(ACTION_SIZE, dtype=np.float32)
+    else:
+        out[:] = 0
+    if isinstance(policy, tuple):
+        action_ids, probs = policy
+        out[action_ids] = probs
+        total = out.sum()
+        if total > 0:
+            # float16 rounding means the stored probabilities rarely sum to 1
+            out /= total
+    else:
+        out[:] = policy
+    return out
+
+
+def densifyBatch(examples):
+    """
+    Input:
+        examples: a list of compact (state, policy, v) or aggregated
+                  (state, policy, v, weight) examples
+
+    Returns:
+        states: float32 array of shape (n, STATE_SIZE)
+        pis: float32 array of shape (n, ACTION_SIZE)
+        vs: float32 array of shape (n,)
+        weights: float32 array of shape (n,), 1 for unaggregated examples
+    """
+    n = len(examples)
+    states = np.empty((n, STATE_SIZE), dtype=np.float32)
+    pis = np.empty((n, ACTION_SIZE), dtype=np.float32)
+    vs = np.empty(n, dtype=np.float32)
+    weights = np.ones(n, dtype=np.float32)
+    for i, example in enumerate(examples):
+        states[i] = example[0]
+        densifyPolicy(example[1], out=pis[i])
+        vs[i] = example[2]
+        if len(example) > 3:
+            weights[i] = example[3]
+    return states, pis, vs, weights
+
+
+def stateKey(state):
+    """
+    Hashable key of a state, the same for its dense and compact forms.
+    """
+    return np.asarray(state, dtype=np.int16).tobytes()
+
+
+def aggregateExamples(examples):
+    """
+    Groups examples by their encoded state and merges each group into one
+    weighted example. Policy and value targets are averaged using the
+    weight of each copy (1 for plain examples), and the merged example
+    carries the total weight of its group.
+
+    Input:
+        examples: an iterable of compact examples
+
+    Returns:
+        aggregated: a list of (state, policy, v, weight) examples
+        ratio: len(aggregated) / total weight of the input examples
+    """
+    groups = {}
+    for example in examples:
+        state = np.asarray(example[0], dtype=np.int16)
+        key = stateKey(state)
+        weight = example[3] if len(example) > 3 else 1
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = [state, np.zeros(ACTION_SIZE, dtype=np.float64), 0., 0.]
+        group[1] += weight * densifyPolicy(example[1])
+        group[2] += weight * example[2]
+        group[3] += weight
+
+    aggregated = []
+    total = 0
+    for state, pi, v, weight in groups.values():
+        total += weight
+        aggregated.append((state, compressPolicy(pi / weight), v / weight, weight))
+
+    if not aggregated:
+        return aggregated, 1.
+    return aggregated, len(aggregated) / total
+
+
+def denseExample(example):
+    """
+    The example in the format self-play used before the compact one: the
+    int32 state from YEET.getState and the policy as a list of floats. Only
+    used to measure what the compact format saves.
+    """
+    state = np.asarray(example[0], dtype=np.int32)
+    return (state, densifyPolicy(example[1]).tolist(), example[2])
+
+
+def exampleNBytes(example):
+    """
+    Approximate memory held by one example, counting the containers, numpy
+    buffers and every Python object they reference once.
+    """
+    seen = set()
+    stack = [example]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+    return total
@@ -3,7 +3,7 @@ import numpy as np
 from fireplace import cards
 from fireplace.exceptions import GameOver, InvalidAction
 from fireplace.game import Game
-from fireplace.player import Player
+from fireplace.player import LegalAction, Player
 from fireplace.utils import random_draft
 from hearthstone.enums import CardClass
 import pickle
@@ -25,7 +25,8 @@ class Board:
 
     def isolateSet(self, filename='notbasicset', set='CardSet.CORE'):
         # isolates the specified card set for exclusion in drafting
-        cards.db.initialize()
+        if not cards.db.initialized:
+            cards.db.initialize()
         extraset = []
         for index, card in cards.db.items():
             if str(card.card_set) != set:
@@ -35,7 +36,8 @@ class Board:
             pickle.dump(extraset, filehandle)
 
     def initGame(self):
-        cards.db.initialize()
+        if not cards.db.initialized:
+            cards.db.initialize()
         if self.is_basic: #create quick simple game
             with open('notbasic.data', 'rb') as f:
                 extra_set = pickle.load(f)
@@ -66,42 +68,30 @@ class Board:
     def getValidMoves(self, game_instance):
         actions = np.zeros((21,18))
         player = game_instance.current_player
-        #If the player is being given a choice, return only valid choices
-        if player.choice:
-            for index, card in enumerate(player.choice.cards):
-                actions[20, index] = 1
-                #actions.append(("choose", card, None))
-
-        else:
-            # add cards in hand
-            for index, card in enumerate(player.hand):
-                if card.is_playable():
-                    if card.requires_target():
-                        for target, card in enumerate(card.targets):
-                            actions[index, target] = 1
-                    elif card.must_choose_one:
-                        for choice, card in enumerate(card.choose_cards):
-                            actions[index, choice] = 1
-                    else:
-                        actions[index] = 1
-            # add targets available to minions that can attack
-            for position, minion in enumerate(player.field):
-                if minion.can_attack():
-                    for target, card in enumerate(minion.attack_targets):
-                        actions[position+10, target] = 1
-            # add hero power and targets if applicable
-            if player.hero.power.is_usable():
-                if player.hero.power.requires_target():
-                    for target, card in enumerate(player.hero.power.targets):
-                        actions[17, target] = 1
+        for action in player.legal_actions():
+            targets = slice(len(action.targets))
+            if action.type == LegalAction.Type.CHOOSE:
+                #If the player is being given a choice, only choices are valid
+                actions[20, action.index] = 1
+            elif action.type == LegalAction.Type.PLAY:
+                # cards in hand, with their targets or choose one choice
+                if action.targets:
+                    actions[action.index, targets] = 1
+                elif action.choice is not None:
+                    actions[action.index, action.choice] = 1
+                else:
+                    actions[action.index] = 1
+            elif action.type == LegalAction.Type.ATTACK:
+                # minions that can attack use rows 10-16, the hero row 18
+                row = 18 if action.index is None else action.index + 10
+                actions[row, targets] = 1
+            elif action.type == LegalAction.Type.HERO_POWER:
+                if action.targets:
+                    actions[17, targets] = 1
                 else:
                     actions[17] = 1
-            # add hero attacking if applicable
-            if player.hero.can_attack():
-                for target, card in enumerate(player.hero.attack_targets):
-                    actions[18, target] = 1
-            # add end turn
-            actions[19,1] = 1
+            elif action.type == LegalAction.Type.END_TURN:
+                actions[19,1] = 1
         return actions
 
     def performAction(self, a, player, game_instance):
@@ -0,0 +1,107 @@
+'''Prioritized sampling over the replay buffer of training examples.
+
+SumTree keeps one priority per example in a binary tree of partial sums so a
+batch can be drawn proportionally to priority, and priorities updated, in
+O(log n) per example. PrioritizedSampler adds the alpha exponent on
+priorities and the beta importance-sampling correction from the
+prioritized experience replay paper (Schaul et al. 2015).
+'''
+import numpy as np
+
+__all__ = ['PrioritizedSampler', 'SumTree']
+
+
+class SumTree(object):
+    """
+    Binary tree stored in a flat array: node i has children 2i and 2i+1,
+    leaves live at [capacity, 2*capacity) and every inner node holds the sum
+    of its children. The root is node 1.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.capacity = 1
+        while self.capacity < size:
+            self.capacity *= 2
+        self.tree = np.zeros(2*self.capacity, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def get(self, ids):
+        return self.tree[np.asarray(ids) + self.capacity]
+
+    def update(self, ids, values):
+        """
+        Sets the leaves ids to values and recomputes their ancestors.
+        Repeated ids are fine, the last value wins.
+        """
+        nodes = np.asarray(ids, dtype=np.int64) + self.capacity
+        self.tree[nodes] = values
+        # all leaves sit at the same depth, so every path reaches the root together
+        while nodes[0] > 1:
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2*nodes] + self.tree[2*nodes + 1]
+
+    def find(self, values):
+        """
+        Input:
+            values: array of prefix sums in [0, total)
+
+        Returns:
+            ids: for each value, the leaf whose cumulative range contains it
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        while nodes[0] < self.capacity:
+            left = 2*nodes
+            go_right = values >= self.tree[left]
+            values = np.where(go_right, values - self.tree[left], values)
+            nodes = np.where(go_right, left + 1, left)
+        # float error can push a value past the last non-empty leaf
+        return np.minimum(nodes - self.capacity, self.size - 1)
+
+
+class PrioritizedSampler(object):
+    """
+    Samples example ids with probability p_i**alpha / sum_k p_k**alpha.
+    Examples start with priority 1 until they are first trained on, unless
+    their raw priorities are given (eg. from a previous round of training).
+    """
+    def __init__(self, size, alpha=0.6, eps=1e-3, priorities=None):
+        self.tree = SumTree(size)
+        self.alpha = alpha
+        self.eps = eps
+        if priorities is None:
+            self.tree.update(np.arange(size), 1.)
+        else:
+            self.update(np.arange(size), priorities)
+
+    def sample(self, batch_size, beta=0.4):
+        """
+        Draws batch_size ids, one from each of batch_size equal slices of the
+        total priority mass.
+
+        Returns:
+            ids: int array of example ids
+            weights: float32 importance-sampling weights (N*P(i))**-beta,
+                     scaled so the largest weight in the batch is 1
+        """
+        total = self.tree.total
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.random(batch_size)) * segment
+        ids = self.tree.find(values)
+
+        probs = self.tree.get(ids) / total
+        weights = (self.tree.size * probs) ** -beta
+        weights /= weights.max()
+        return ids, weights.astype(np.float32)
+
+    def update(self, ids, priorities):
+        """
+        Input:
+            ids: example ids returned by sample()
+            priorities: new raw priorities (eg. value loss or policy entropy)
+        """
+        priorities = np.abs(np.asarray(priorities, dtype=np.float64)) + self.eps
+        self.tree.update(ids, priorities ** self.alpha)
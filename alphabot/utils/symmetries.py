@@ -0,0 +1,49 @@
+'''Symmetry augmentation for batches of (state, pi) training examples.
+
+The order of the cards in hand carries no information: shuffling the hand
+slots of the state (features 173-262, 9 per card) together with the matching
+policy rows (0-9, "play card in hand position") gives another valid example.
+Only occupied slots are shuffled so that, like YEET.getState, cards stay
+packed at the front of the hand.
+
+Minion slots are left alone: board position matters (adjacency) and the
+target columns of the policy index into position-ordered target lists.
+'''
+import numpy as np
+
+__all__ = ['HAND_FEATURES', 'HAND_OFFSET', 'HAND_SLOTS', 'permuteHands']
+
+HAND_OFFSET = 173
+HAND_SLOTS = 10
+HAND_FEATURES = 9
+
+
+def permuteHands(states, pis, rng=np.random):
+    """
+    Input:
+        states: array of shape (n, 263)
+        pis: array of shape (n, 378) or (n, 21, 18)
+        rng: source of randomness (np.random or a np.random.Generator)
+
+    Returns:
+        states, pis: new arrays where every row had its occupied hand slots
+                     shuffled by an independent random permutation
+    """
+    n = len(states)
+    end = HAND_OFFSET + HAND_SLOTS*HAND_FEATURES
+    hands = states[:, HAND_OFFSET:end].reshape(n, HAND_SLOTS, HAND_FEATURES)
+
+    # Random sort keys for occupied slots, +inf for empty ones: argsort then
+    # yields a permutation of the occupied prefix and leaves the rest in place
+    keys = rng.random((n, HAND_SLOTS))
+    keys[hands[:, :, 0] == 0] = np.inf
+    perm = np.argsort(keys, axis=1, kind='stable')
+    rows = np.arange(n)[:, None]
+
+    new_states = states.copy()
+    new_states[:, HAND_OFFSET:end] = hands[rows, perm].reshape(n, -1)
+
+    shape = pis.shape
+    new_pis = pis.reshape(n, 21, 18).copy()
+    new_pis[:, :HAND_SLOTS] = new_pis[rows, perm]
+    return new_states, new_pis.reshape(shape)
@@ -133,14 +133,16 @@ class Action(metaclass=ActionMeta):
 			if event.at != at:
 				continue
 			if isinstance(event.trigger, self.__class__) and event.trigger.matches(entity, args):
-				log.info("%r triggers off %r from %r", entity, self, source)
+				if log.enabled:
+					log.info("%r triggers off %r from %r", entity, self, source)
 				entity.trigger_event(source, event, args)
 
 	def broadcast(self, source, at, *args):
-		for entity in source.game.entities:
+		game = source.game
+		for entity in game.event_listeners(self.__class__):
 			self._broadcast(entity, source, at, *args)
 
-		for entity in source.game.hands:
+		for entity in game.event_listeners(self.__class__, hands=True):
 			self._broadcast(entity, source, at, *args)
 
 	def queue_broadcast(self, obj, args):
@@ -166,11 +168,8 @@ class Action(metaclass=ActionMeta):
 				res = match(arg)
 				if not res:
 					return False
-			else:
-				# this stuff is stupidslow
-				res = match.eval([arg], source)
-				if not res or res[0] is not arg:
-					return False
+			elif not match.matches(arg, source):
+				return False
 		return True
 
 
@@ -415,7 +414,8 @@ class Play(GameAction):
 
 	def do(self, source, card, target, index, choose):
 		player = source
-		log.info("%s plays %r (target=%r, index=%r)", player, card, target, index)
+		if log.enabled:
+			log.info("%s plays %r (target=%r, index=%r)", player, card, target, index)
 
 		player.pay_cost(card, card.cost)
 
@@ -570,13 +570,15 @@ class TargetedAction(Action):
 			args = self.get_args(source)
 			targets = self.get_targets(source, args[0])
 			args = args[1:]
-			log.info("%r triggering %r targeting %r", source, self, targets)
+			if log.enabled:
+				log.info("%r triggering %r targeting %r", source, self, targets)
 			for target in targets:
 				target_args = self.get_target_args(source, target)
 				ret.append(self.do(source, target, *target_args))
 
 				for action in self.callback:
-					log.info("%r queues up callback %r", self, action)
+					if log.enabled:
+						log.info("%r queues up callback %r", self, action)
 					ret += source.game.queue_actions(source, [action], event_args=[target] + target_args)
 
 		self.resolve_broadcasts()
@@ -775,7 +777,7 @@ class Discover(TargetedAction):
 			discover_class = source.data.card_class
 		else:
 			# use random class for neutral hero classes with neutral cards
-			discover_class = random_class()
+			discover_class = random_class(source.game.random)
 
 		picker = self._args[1] * 3
 		picker = picker.copy_with_weighting(1, card_class=CardClass.NEUTRAL)
@@ -1091,7 +1093,11 @@ class Silence(TargetedAction):
 
 		# Wipe the event listeners
 		target._events = []
+		target.game.invalidate_event_listeners()
 		target.silenced = True
+		target.clear_attribute_cache()
+		# Health scripts of the card itself no longer apply
+		target.game.queue_death_check(target)
 
 
 class Summon(TargetedAction):
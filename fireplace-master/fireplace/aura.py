@@ -1,3 +1,6 @@
+from hearthstone.enums import GameTag, Zone
+
+from .dsl.selector import LazyValue, Selector, depends_on_zones_only
 from .logging import log
 from .managers import CardManager
 
@@ -14,11 +17,15 @@ class AuraBuff:
 	def update_tags(self, tags):
 		self.tags.update(tags)
 		self.tick = self.source.game.tick
+		self.entity.clear_attribute_cache()
+		self.source.game.queue_death_check(self.entity)
 
 	def remove(self):
 		log.info("Destroying %r", self)
 		self.entity.slots.remove(self)
 		self.source.game.active_aura_buffs.remove(self)
+		self.entity.clear_attribute_cache()
+		self.source.game.queue_death_check(self.entity)
 
 	def _getattr(self, attr, i):
 		value = getattr(self, attr, 0)
@@ -36,12 +43,22 @@ class Refresh:
 		self.tags = tags
 		self.buff = buff
 		self.priority = priority
+		# Whether the refresh can be skipped until the next zone move,
+		# see BaseGame.refresh_auras()
+		self.zone_dependent = depends_on_zones_only(selector) and all(
+			depends_on_zones_only(value) for value in (tags or {}).values()
+		)
 
 	def trigger(self, source):
+		"""
+		Refreshes the aura on every selected entity and returns the list
+		of buffs and aura slots it refreshed.
+		"""
+		ret = []
 		entities = self.selector.eval(source.game, source)
 		for entity in entities:
 			if self.buff:
-				entity.refresh_buff(source, self.buff)
+				ret.append(entity.refresh_buff(source, self.buff))
 			else:
 				tags = {}
 				for tag, value in self.tags.items():
@@ -49,7 +66,8 @@ class Refresh:
 						value = value.evaluate(source)
 					tags[tag] = value
 
-				entity.refresh_tags(source, tags)
+				ret.append(entity.refresh_tags(source, tags))
+		return ret
 
 	def __repr__(self):
 		return "Refresh(%r, %r, %r)" % (self.selector, self.tags or {}, self.buff or "")
@@ -66,15 +84,16 @@ class TargetableByAuras:
 			buff = source.buff(self, id)
 			buff.tick = source.game.tick
 			source.game.active_aura_buffs.append(buff)
+		return buff
 
 	def refresh_tags(self, source, tags):
 		for slot in self.slots:
 			if slot.source is source:
 				slot.update_tags(tags)
-				break
-		else:
-			buff = AuraBuff(source, self)
-			log.info("Creating %r", buff)
-			buff.update_tags(tags)
-			self.slots.append(buff)
-			source.game.active_aura_buffs.append(buff)
+				return slot
+		buff = AuraBuff(source, self)
+		log.info("Creating %r", buff)
+		buff.update_tags(tags)
+		self.slots.append(buff)
+		source.game.active_aura_buffs.append(buff)
+		return buff
@@ -1,4 +1,3 @@
-import random
 from hearthstone.enums import CardClass, CardType, GameTag
 from ..cards.brawl.banana_brawl import RandomBanana
 from ..cards.utils import *
@@ -57,11 +56,12 @@ class BlackrockShowdownBrawl(Game):
 	], "TBA01_1")
 
 	@classmethod
-	def new_game(cls, *players):
-		decks = random.sample((cls.NEFARIAN_DECK, cls.RAGNAROS_DECK), 2)
+	def new_game(cls, *players, seed=None, simulation=False):
+		game = cls(players, seed, simulation)
+		decks = game.random.sample((cls.NEFARIAN_DECK, cls.RAGNAROS_DECK), 2)
 		for player, deck in zip(players, decks):
 			player.starting_deck, player.starting_hero = deck
-		return cls(players)
+		return game
 
 	def setup(self):
 		super().setup()
@@ -98,16 +98,16 @@ class SpidersEverywhereBrawl(Game):
 	Webspinners.
 	"""
 
-	def __init__(self, players):
+	def __init__(self, players, seed=None, simulation=False):
 		from .. import cards
-		super().__init__(players)
+		super().__init__(players, seed, simulation)
 		for player in players:
 			hero = player.starting_hero
 			player_class = getattr(cards, hero).card_class
 			spells = cards.filter(card_class=player_class, type=CardType.SPELL)
 			deck = ["FP1_011"] * 23
 			for i in range(7):
-				deck.append(random.choice(spells))
+				deck.append(self.random.choice(spells))
 			player.starting_deck, player.starting_hero = deck, hero
 
 
@@ -135,16 +135,16 @@ class CrossroadsEncounterBrawl(Game):
 	Let's see what's in your deck this time!
 	"""
 
-	def __init__(self, players):
+	def __init__(self, players, seed=None, simulation=False):
 		from .. import cards
-		super().__init__(players)
+		super().__init__(players, seed, simulation)
 		for player in players:
 			hero = player.starting_hero
 			player_class = getattr(cards, hero).card_class
 			pool = cards.filter(card_class=player_class, collectible=True)
-			deck = [random.choice(pool) for i in range(15)]
+			deck = [self.random.choice(pool) for i in range(15)]
 			pool = cards.filter(card_class=CardClass.INVALID, collectible=True)
-			deck += [random.choice(pool) for i in range(15)]
+			deck += [self.random.choice(pool) for i in range(15)]
 			player.starting_deck, player.starting_hero = deck, hero
 
 
@@ -173,16 +173,16 @@ class TooManyPortalsBrawl(Game):
 	"""
 	UNSTABLE_PORTAL = "GVG_003"
 
-	def __init__(self, players):
+	def __init__(self, players, seed=None, simulation=False):
 		from .. import cards
-		super().__init__(players)
+		super().__init__(players, seed, simulation)
 		for player in players:
 			hero = player.starting_hero
 			player_class = getattr(cards, hero).card_class
 			spells = cards.filter(card_class=player_class, type=CardType.SPELL)
 			deck = [self.UNSTABLE_PORTAL] * 23
 			for i in range(7):
-				deck.append(random.choice(spells))
+				deck.append(self.random.choice(spells))
 			player.starting_deck, player.starting_hero = deck, hero
 
 
@@ -258,11 +258,12 @@ class GrandTournamentBrawl(Game):
 	], "HERO_08a")
 
 	@classmethod
-	def new_game(cls, *players):
-		decks = random.sample((cls.ALLERIA_DECK, cls.MEDIVH_DECK), 2)
+	def new_game(cls, *players, seed=None, simulation=False):
+		game = cls(players, seed, simulation)
+		decks = game.random.sample((cls.ALLERIA_DECK, cls.MEDIVH_DECK), 2)
 		for player, deck in zip(players, decks):
 			player.starting_deck, player.starting_hero = deck
-		return cls(players)
+		return game
 
 
 class RainingManaBrawl(Game):
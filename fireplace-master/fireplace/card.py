@@ -36,7 +36,6 @@ class BaseCard(BaseEntity):
 	def __init__(self, data):
 		self.data = data
 		super().__init__()
-		self.requirements = data.requirements.copy()
 		self.id = data.id
 		self.controller = None
 		self.choose = None
@@ -44,7 +43,29 @@ class BaseCard(BaseEntity):
 		self.aura = False
 		self.heropower_damage = 0
 		self._zone = Zone.INVALID
+		self._set_data_tags(data)
+
+	@property
+	def requirements(self):
+		return self.data.requirements
+
+	def _set_data_tags(self, data):
+		"""
+		Set the tags of \a data on the card. The instance attributes they
+		result in are recorded on the first card of its class built from
+		\a data, and copied straight into the following ones.
+		"""
+		attrs_by_class = data.__dict__.setdefault("entity_attrs", {})
+		attrs = attrs_by_class.get(self.__class__)
+		if attrs is not None:
+			self.__dict__.update(attrs)
+			return
+
+		before = self.__dict__.copy()
 		self.tags.update(data.tags)
+		attrs_by_class[self.__class__] = {
+			k: v for k, v in self.__dict__.items() if k not in before or before[k] is not v
+		}
 
 	def __str__(self):
 		return self.data.name
@@ -72,6 +93,9 @@ class BaseCard(BaseEntity):
 
 	@zone.setter
 	def zone(self, value):
+		# Views built while moving (eg. by a Hero summoning its power) are
+		# dropped by the increment at the end of BaseCard._set_zone()
+		self.game._zone_version += 1
 		self._set_zone(value)
 
 	def _set_zone(self, value):
@@ -81,7 +105,7 @@ class BaseCard(BaseEntity):
 			self.logger.warning("%r attempted a same-zone move in %r", self, old)
 			return
 
-		if old:
+		if old and self.logger.enabled:
 			self.logger.debug("%r moves from %r to %r", self, old, value)
 
 		caches = {
@@ -95,6 +119,7 @@ class BaseCard(BaseEntity):
 		if caches.get(value) is not None:
 			caches[value].append(self)
 		self._zone = value
+		self.game._zone_version += 1
 
 		if value == Zone.PLAY:
 			self.play_counter = self.game.play_counter
@@ -105,7 +130,7 @@ class BaseCard(BaseEntity):
 		Summon \a buff and apply it to \a target
 		If keyword arguments are given, attempt to set the given
 		values to the buff. Example:
-		player.buff(target, health=random.randint(1, 5))
+		player.buff(target, health=self.game.random.randint(1, 5))
 		NOTE: Any Card can buff any other Card. The controller of the
 		Card that buffs the target becomes the controller of the buff.
 		"""
@@ -165,6 +190,7 @@ class PlayableCard(BaseCard, Entity, TargetableByAuras):
 	@cost.setter
 	def cost(self, value):
 		self._cost = value
+		self.clear_attribute_cache()
 
 	@property
 	def must_choose_one(self):
@@ -362,7 +388,17 @@ class PlayableCard(BaseCard, Entity, TargetableByAuras):
 
 	@property
 	def play_targets(self):
-		return [card for card in self.game.characters if is_valid_target(self, card)]
+		# Memoized until the next aura refresh or zone move
+		key = ("play_targets", self.game._zone_version)
+		ret = self._cached_attr(key)
+		if ret is None or self.game.check_attribute_cache:
+			value = [card for card in self.game.characters if is_valid_target(self, card)]
+			if ret is not None:
+				assert ret == value, "Cached targets of %r are %r, should be %r" % (self, ret, value)
+			ret = value
+			self._cache_attr(key, ret)
+		# Callers may modify the list they get
+		return ret[:]
 
 	@property
 	def targets(self):
@@ -377,6 +413,13 @@ class LiveEntity(PlayableCard, Entity):
 	incoming_damage_multiplier = int_property("incoming_damage_multiplier")
 	max_health = int_property("max_health")
 
+	@max_health.setter
+	def max_health(self, value):
+		self._max_health = value
+		self.clear_attribute_cache()
+		if self.zone == Zone.PLAY:
+			self.game.queue_death_check(self)
+
 	def __init__(self, data):
 		super().__init__(data)
 		self._to_be_destroyed = False
@@ -392,6 +435,7 @@ class LiveEntity(PlayableCard, Entity):
 		super()._set_zone(zone)
 		# See issue #283 (Malorne, Anub'arak)
 		self._to_be_destroyed = False
+		self.game.queue_death_check(self)
 
 	@property
 	def immune(self):
@@ -424,6 +468,16 @@ class LiveEntity(PlayableCard, Entity):
 	def delayed_destruction(self):
 		return self.zone == Zone.PLAY
 
+	@property
+	def damage(self):
+		return self._damage
+
+	@damage.setter
+	def damage(self, value):
+		self._damage = value
+		if self.zone == Zone.PLAY:
+			self.game.queue_death_check(self)
+
 	@property
 	def to_be_destroyed(self):
 		return getattr(self, self.health_attribute) == 0 or self._to_be_destroyed
@@ -431,6 +485,8 @@ class LiveEntity(PlayableCard, Entity):
 	@to_be_destroyed.setter
 	def to_be_destroyed(self, value):
 		self._to_be_destroyed = value
+		if self.zone == Zone.PLAY:
+			self.game.queue_death_check(self)
 
 	@property
 	def killed_this_turn(self):
@@ -469,6 +525,10 @@ class Character(LiveEntity):
 			ret += rules.HEAVILY_ARMORED
 		return ret
 
+	@property
+	def potential_events(self):
+		return super().events + rules.HEAVILY_ARMORED
+
 	@property
 	def attackable(self):
 		return not self.immune
@@ -735,6 +795,13 @@ class Secret(Spell):
 			ret += self.data.scripts.secret
 		return ret
 
+	@property
+	def potential_events(self):
+		ret = super().events
+		if self.zone == Zone.SECRET:
+			ret += self.data.scripts.secret
+		return ret
+
 	@property
 	def exhausted(self):
 		return self.zone == Zone.SECRET and self.controller.current_player
@@ -794,6 +861,11 @@ class Enchantment(BaseCard):
 		i += getattr(self, "_" + attr, 0)
 		return getattr(self.data.scripts, attr, lambda s, x: x)(self, i)
 
+	def clear_attribute_cache(self):
+		owner = getattr(self, "owner", None)
+		if owner is not None:
+			owner.clear_attribute_cache()
+
 	def _set_zone(self, zone):
 		if zone == Zone.PLAY:
 			self.owner.buffs.append(self)
@@ -806,6 +878,9 @@ class Enchantment(BaseCard):
 			if self in self.game.active_aura_buffs:
 				self.game.active_aura_buffs.remove(self)
 		super()._set_zone(zone)
+		if zone in (Zone.PLAY, Zone.REMOVEDFROMGAME):
+			self.owner.clear_attribute_cache()
+			self.game.queue_death_check(self.owner)
 
 	def apply(self, target):
 		self.log("Applying %r to %r", self, target)
@@ -841,6 +916,8 @@ class Weapon(rules.WeaponRules, LiveEntity):
 	@max_durability.setter
 	def max_durability(self, value):
 		self._max_durability = value
+		if self.zone == Zone.PLAY:
+			self.game.queue_death_check(self)
 
 	@property
 	def exhausted(self):
@@ -1,15 +1,78 @@
+import hashlib
 import os
-from pkg_resources import resource_filename
+import pickle
+import sys
+from xml.etree import ElementTree
+
+from pkg_resources import get_distribution, resource_filename
 from hearthstone import cardxml
 from hearthstone.enums import CardType
 from ..logging import log
 from ..rules import POISONOUS
-from ..utils import get_script_definition
+from ..utils import get_script_definition, get_script_index
+
+
+# Bump when the layout of the cached cards changes
+CACHE_VERSION = 1
+CACHE_DIR = os.environ.get(
+	"FIREPLACE_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "fireplace")
+)
+
+
+class LazyScripts:
+	"""
+	Binds the scripts of a card the first time they are read.
+	"""
+	def __get__(self, card, owner):
+		if card is None:
+			return self
+		CardDB.bind_scripts(card, get_script_definition(card.id))
+		# bind_scripts() stored them on the card, shadowing this descriptor
+		return card.scripts
+
+
+class CardData(cardxml.CardXML):
+	"""
+	A card from the card database, whose scripts are only looked up and
+	merged in when first needed.
+	"""
+	scripts = LazyScripts()
+
+	@property
+	def requirements(self):
+		# CardXML builds a new dict on every read, cards share this one
+		ret = self.__dict__.get("_requirements")
+		if ret is None:
+			ret = self._requirements = super().requirements
+		return ret
+
+	def __deepcopy__(self, memo):
+		# Card data is never modified: copies of a game keep sharing it
+		return self
 
 
 class CardDB(dict):
 	def __init__(self):
 		self.initialized = False
+		self._clear_indexes()
+
+	def __setitem__(self, id, card):
+		super().__setitem__(id, card)
+		self._clear_indexes()
+
+	def __delitem__(self, id):
+		super().__delitem__(id)
+		self._clear_indexes()
+
+	def update(self, *args, **kwargs):
+		super().update(*args, **kwargs)
+		self._clear_indexes()
+
+	def _clear_indexes(self):
+		# attribute -> {value: set of card ids}, built on first filter
+		self._indexes = {}
+		self._filter_cache = {}
+		self._positions = None
 
 	@staticmethod
 	def merge(id, card, cardscript=None):
@@ -23,6 +86,31 @@ class CardDB(dict):
 		if cardscript is None:
 			cardscript = get_script_definition(id)
 
+		CardDB.merge_tags(card, cardscript)
+		CardDB.bind_scripts(card, cardscript)
+		return card
+
+	@staticmethod
+	def merge_tags(card, cardscript):
+		"""
+		Apply the choose one cards and tags of \a cardscript to \a card.
+		"""
+		# Set choose one cards
+		if hasattr(cardscript, "choose"):
+			card.choose_cards = cardscript.choose[:]
+		else:
+			card.choose_cards = []
+
+		if hasattr(cardscript, "tags"):
+			for tag, value in cardscript.tags.items():
+				card.tags[tag] = value
+
+	@staticmethod
+	def bind_scripts(card, cardscript):
+		"""
+		Build the scripts class of \a card from its definition \a cardscript.
+		"""
+		id = card.id
 		if cardscript:
 			card.scripts = type(id, (cardscript, ), {})
 		else:
@@ -68,30 +156,85 @@ class CardDB(dict):
 		if not hasattr(card.scripts.Hand.update, "__iter__"):
 			card.scripts.Hand.update = (card.scripts.Hand.update, )
 
-		# Set choose one cards
-		if hasattr(cardscript, "choose"):
-			card.choose_cards = cardscript.choose[:]
-		else:
-			card.choose_cards = []
-
-		if hasattr(cardscript, "tags"):
-			for tag, value in cardscript.tags.items():
-				card.tags[tag] = value
-
 		# Set some additional events based on the base tags...
 		if card.poisonous:
 			card.scripts.events.append(POISONOUS)
 
-		return card
+	@staticmethod
+	def cache_path(xml_path, locale):
+		"""
+		Returns the path of the card cache for the given cardxml file. The
+		file name hashes the cardxml, the fireplace sources and everything
+		else the cached cards depend on, so stale caches are never read.
+		"""
+		key = hashlib.sha1()
+		key.update(repr((
+			CACHE_VERSION, locale, get_distribution("hearthstone").version,
+			sys.version_info[:2]
+		)).encode())
+		source_dir = os.path.dirname(os.path.dirname(__file__))
+		sources = sorted(
+			os.path.join(root, name) for root, dirs, files in os.walk(source_dir)
+			for name in files if name.endswith(".py")
+		)
+		for filename in [xml_path] + sources:
+			with open(filename, "rb") as f:
+				key.update(f.read())
+		return os.path.join(CACHE_DIR, "cards-%s.pickle" % (key.hexdigest()))
 
-	def initialize(self):
+	@staticmethod
+	def load_xml(xml_path, locale):
+		"""
+		Parse the cardxml and merge the tags of the card definitions in.
+		Only the strings of \a locale are kept.
+		"""
+		db = {}
+		with open(xml_path, "rb") as f:
+			xml = ElementTree.parse(f)
+		for carddata in xml.findall("Entity"):
+			card = CardData.from_xml(carddata)
+			card.locale = locale
+			for tag, strings in card.strings.items():
+				if isinstance(strings, dict):
+					card.strings[tag] = {locale: strings[locale]} if locale in strings else {}
+			CardDB.merge_tags(card, get_script_definition(card.id))
+			db[card.id] = card
+		return db
+
+	def initialize(self, locale="enUS", cache=True):
+		"""
+		Load the card database. With \a cache, the parsed cards are saved to
+		and loaded from CACHE_DIR. Card scripts are bound on first access.
+		"""
 		log.info("Initializing card database")
 		self.initialized = True
-		db, xml = cardxml.load()
-		for id, card in db.items():
-			self[id] = self.merge(id, card)
+		xml_path = cardxml.get_default_carddefs_path()
+		db = None
+		if cache:
+			path = self.cache_path(xml_path, locale)
+			if os.path.exists(path):
+				try:
+					with open(path, "rb") as f:
+						db = pickle.load(f)
+				except Exception as e:
+					log.warning("Could not load card cache %r: %s", path, e)
 
-		log.info("Merged %i cards", len(self))
+		if db is None:
+			db = self.load_xml(xml_path, locale)
+			if cache:
+				try:
+					os.makedirs(CACHE_DIR, exist_ok=True)
+					tmp_path = "%s.%i.tmp" % (path, os.getpid())
+					with open(tmp_path, "wb") as f:
+						pickle.dump(db, f, protocol=pickle.HIGHEST_PROTOCOL)
+					os.replace(tmp_path, path)
+				except OSError as e:
+					log.warning("Could not write card cache %r: %s", path, e)
+
+		self.update(db)
+		# Importing the card sets registers the custom cards
+		get_script_index()
+		log.info("Loaded %i cards", len(self))
 
 	def filter(self, **kwargs):
 		"""
@@ -105,22 +248,83 @@ class CardDB(dict):
 		\a rarity: The rarity of the card (hearthstone.enums.Rarity)
 		\a cost: The mana cost of the card
 		"""
+		return list(self.pool(**kwargs))
+
+	def pool(self, **kwargs):
+		"""
+		Like filter(), but returns the memoized tuple of matching card IDs
+		itself, shared between all the callers using the same filters.
+		"""
 		if not self.initialized:
 			self.initialize()
 
-		cards = self.values()
-
 		if "type" not in kwargs:
 			kwargs["type"] = [CardType.SPELL, CardType.WEAPON, CardType.MINION]
 
+		filters = []
 		for attr, value in kwargs.items():
 			if value is not None:
-				# What? this doesn't work?
-				# cards = __builtins__["filter"](lambda c: getattr(c, attr) == value, cards)
-				cards = [
-					card for card in cards if (isinstance(value, list) and getattr(card, attr) in value) or
-					getattr(card, attr) == value
-				]
+				if isinstance(value, list):
+					value = tuple(value)
+				filters.append((attr, value))
+
+		try:
+			key = frozenset(filters)
+			ret = self._filter_cache.get(key)
+		except TypeError:
+			# Unhashable filter value, nothing can be indexed
+			return tuple(self._filter_scan(filters))
+
+		if ret is None:
+			ret = tuple(self._filter_indexed(filters))
+			self._filter_cache[key] = ret
+
+		return ret
+
+	def _index(self, attr):
+		"""
+		Returns the inverted index of \a attr, mapping each value of the
+		attribute to the set of ids of the cards having it.
+		"""
+		index = self._indexes.get(attr)
+		if index is None:
+			index = {}
+			for card in self.values():
+				index.setdefault(getattr(card, attr), set()).add(card.id)
+			self._indexes[attr] = index
+		return index
+
+	def _filter_indexed(self, filters):
+		if self._positions is None:
+			self._positions = {id: i for i, id in enumerate(self)}
+
+		ret = None
+		for attr, value in filters:
+			try:
+				index = self._index(attr)
+			except TypeError:
+				# The attribute has unhashable values
+				return self._filter_scan(filters)
+			if isinstance(value, tuple):
+				ids = set()
+				for v in value:
+					ids.update(index.get(v, ()))
+			else:
+				ids = index.get(value, set())
+			ret = ids if ret is None else ret & ids
+
+		if ret is None:
+			return list(self)
+		# Keep the order of the card database
+		return sorted(ret, key=self._positions.__getitem__)
+
+	def _filter_scan(self, filters):
+		cards = self.values()
+		for attr, value in filters:
+			cards = [
+				card for card in cards if (isinstance(value, tuple) and getattr(card, attr) in value) or
+				getattr(card, attr) == value
+			]
 
 		return [card.id for card in cards]
 
@@ -1,4 +1,3 @@
-import random
 from copy import copy, deepcopy
 
 from hearthstone.enums import CardType, Race, Rarity
@@ -51,7 +50,8 @@ class RandomCardPicker(LazyValue):
 
 	def find_cards(self, source=None, **filters):
 		"""
-		Generate a card pool with all cards matching specified filters
+		Generate a card pool with all cards matching specified filters.
+		The pool is shared with the card database and must not be modified.
 		"""
 		if not filters:
 			new_filters = self.filters.copy()
@@ -63,7 +63,7 @@ class RandomCardPicker(LazyValue):
 				new_filters[k] = v.evaluate(source)
 
 		from .. import cards
-		return cards.filter(**new_filters)
+		return cards.db.pool(**new_filters)
 
 	def evaluate(self, source, cards=None) -> str:
 		"""
@@ -75,7 +75,7 @@ class RandomCardPicker(LazyValue):
 		if cards:
 			# Use specific card list if given
 			self.weights = [1]
-			card_sets = [list(cards)]
+			card_sets = [cards]
 		elif not self.weightedfilters:
 			# Use global filters if no weighted filter sets given
 			self.weights = [1]
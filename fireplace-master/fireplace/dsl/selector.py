@@ -1,5 +1,4 @@
 import operator
-import random
 from abc import ABCMeta, abstractmethod
 from enum import IntEnum
 from typing import Any, Callable, Iterable, List, Optional, Set, Union
@@ -8,7 +7,7 @@ from hearthstone.enums import CardClass, CardType, GameTag, Race, Rarity, Zone
 
 from .. import enums
 from ..entity import BaseEntity
-from .lazynum import Attr, LazyValue, OpAttr
+from .lazynum import Attr, Count, LazyValue, OpAttr
 
 
 # Type aliases
@@ -30,6 +29,26 @@ class Selector:
 	def eval(self, entities: List[BaseEntity], source: BaseEntity) -> List[BaseEntity]:
 		return entities
 
+	def predicate(self, entities, source: BaseEntity) -> Callable[[BaseEntity], bool]:
+		"""
+		Returns a function telling whether an entity of \a entities is
+		selected, which lets SetOpSelector fuse a whole selector tree into
+		a single filter pass. By default the selector is evaluated and its
+		results are looked up by entity id.
+		"""
+		entity_ids = set(e.entity_id for e in self.eval(entities, source) if e)
+		return lambda entity: entity.entity_id in entity_ids
+
+	def matches(self, entity: BaseEntity, source: BaseEntity) -> bool:
+		"""
+		Returns whether the selector would select \a entity on its own,
+		as used by event listeners to test the arguments of an action.
+		Selectors which test each entity separately override this to
+		avoid evaluating the selector over a one-element list.
+		"""
+		res = self.eval([entity], source)
+		return bool(res) and res[0] is entity
+
 	def __add__(self, other: SelectorLike) -> "Selector":
 		return SetOpSelector(operator.and_, self, other)
 
@@ -67,9 +86,20 @@ class EnumSelector(Selector):
 		self.tag_enum = tag_enum
 
 	def eval(self, entities, source):
+		test = self.predicate(entities, source)
+		return [e for e in entities if test(e)]
+
+	def predicate(self, entities, source):
+		test = self._test()
+		return lambda entity: test(entity, source)
+
+	def matches(self, entity, source):
+		return bool(self._test()(entity, source))
+
+	def _test(self):
 		if not self.tag_enum or not hasattr(self.tag_enum, "test"):
 			raise RuntimeError("Unsupported enum type {}".format(str(self.tag_enum)))
-		return [e for e in entities if self.tag_enum.test(e, source)]
+		return self.tag_enum.test
 
 	def __repr__(self):
 		return "<%s>" % (self.tag_enum.name)
@@ -141,14 +171,22 @@ class ComparisonSelector(Selector):
 		self.right = right
 
 	def eval(self, entities, source):
-		right_value = (
-			self.right.evaluate(source) if isinstance(self.right, LazyValue)
-			else self.right
-		)
-		return [
-			e for e in entities
-			if self.op(self.left.value(e, source), right_value)
-		]
+		test = self.predicate(entities, source)
+		return [e for e in entities if test(e)]
+
+	def predicate(self, entities, source):
+		right_value = self._right_value(source)
+		op = self.op
+		value = self.left.value
+		return lambda entity: op(value(entity, source), right_value)
+
+	def matches(self, entity, source):
+		return bool(self.op(self.left.value(entity, source), self._right_value(source)))
+
+	def _right_value(self, source):
+		if isinstance(self.right, LazyValue):
+			return self.right.evaluate(source)
+		return self.right
 
 	def __repr__(self):
 		if self.op.__name__ == "eq":
@@ -179,6 +217,13 @@ class FilterSelector(Selector):
 	def eval(self, entities, source):
 		return [e for e in entities if self.func(e, source)]
 
+	def predicate(self, entities, source):
+		func = self.func
+		return lambda entity: func(entity, source)
+
+	def matches(self, entity, source):
+		return bool(self.func(entity, source))
+
 
 class FuncSelector(Selector):
 	def __init__(self, func: Callable[[List[BaseEntity], BaseEntity], List[BaseEntity]]):
@@ -211,20 +256,61 @@ class SetOpSelector(Selector):
 		self.op = op
 		self.left = left
 		self.right = right
+		self._zone_dependent = None
 
 	@staticmethod
 	def _entity_id_set(entities: Iterable[BaseEntity]) -> Set[BaseEntity]:
 		return set(e.entity_id for e in entities if e)
 
+	@property
+	def zone_dependent(self):
+		"""
+		True if the selector always selects the same entities as long as
+		no entity changes zone, see depends_on_zones_only().
+		"""
+		if self._zone_dependent is None:
+			self._zone_dependent = depends_on_zones_only(self)
+		return self._zone_dependent
+
 	def eval(self, entities, source):
-		left_children = self.left.eval(entities, source)
-		right_children = self.right.eval(entities, source)
+		game = getattr(source, "game", None)
+		if entities is game and game.memoize_selectors and self.zone_dependent:
+			return game.selection_cache.select(self, source)
+		return self.filter(entities, source)
+
+	def filter(self, entities, source):
+		"""
+		Evaluate the selector tree in a single pass over \a entities
+		"""
+		test = self.predicate(entities, source)
+		# Preserve input ordering and multiplicity
+		return [e for e in entities if test(e)]
+
+	def predicate(self, entities, source):
+		# Children are set up in order, as lazy values may draw random numbers
+		left = self.left.predicate(entities, source)
+		right = self.right.predicate(entities, source)
+		if self.op is operator.and_:
+			return lambda entity: left(entity) and right(entity)
+		elif self.op is operator.or_:
+			return lambda entity: left(entity) or right(entity)
+		elif self.op is operator.sub:
+			return lambda entity: left(entity) and not right(entity)
+
 		result_entity_ids = self.op(
-			self._entity_id_set(left_children),
-			self._entity_id_set(right_children)
+			set(e.entity_id for e in entities if e and left(e)),
+			set(e.entity_id for e in entities if e and right(e))
 		)
-		# Preserve input ordering and multiplicity
-		return [e for e in entities if e.entity_id in result_entity_ids]
+		return lambda entity: entity.entity_id in result_entity_ids
+
+	def matches(self, entity, source):
+		if self.op is operator.and_:
+			return self.left.matches(entity, source) and self.right.matches(entity, source)
+		elif self.op is operator.or_:
+			return self.left.matches(entity, source) or self.right.matches(entity, source)
+		elif self.op is operator.sub:
+			return self.left.matches(entity, source) and not self.right.matches(entity, source)
+		return super().matches(entity, source)
 
 	def __repr__(self):
 		name = self.op.__name__
@@ -240,6 +326,33 @@ class SetOpSelector(Selector):
 		return "<%r %s %r>" % (self.left, infix, self.right)
 
 
+class SelectionCache(dict):
+	"""
+	Results of the zone dependent selectors evaluated over a whole game,
+	kept until the next zone move. Copies of the cache start out empty.
+	"""
+	def __init__(self, game):
+		super().__init__()
+		self.game = game
+		self.version = None
+
+	def __reduce__(self):
+		return (SelectionCache, (self.game, ))
+
+	def select(self, selector, source):
+		game = self.game
+		if self.version != game._zone_version:
+			self.clear()
+			self.version = game._zone_version
+		key = id(selector), id(source)
+		cached = self.get(key)
+		if cached is None or cached[0] is not selector or cached[1] is not source:
+			cached = selector, source, selector.filter(game, source)
+			self[key] = cached
+		# Callers may modify the list they get
+		return cached[2][:]
+
+
 SELF = FuncSelector(lambda _, source: [source])
 OWNER = FuncSelector(
 	lambda entities, source: [source.owner] if hasattr(source, "owner") else []
@@ -306,7 +419,7 @@ class RandomSelector(Selector):
 
 	def eval(self, entities, source):
 		child_entities = self.child.eval(entities, source)
-		return random.sample(child_entities, min(len(child_entities), self.times))
+		return source.game.random.sample(child_entities, min(len(child_entities), self.times))
 
 	def __mul__(self, other):
 		return RandomSelector(self.child, self.times * other)
@@ -353,6 +466,40 @@ class Opponent(Controller):
 		return entity.controller.opponent
 
 
+# Tags and enums whose value on an entity can only change by moving it
+# to another zone (or never changes at all)
+ZONE_TAGS = (GameTag.CARDTYPE, GameTag.CONTROLLER, GameTag.ZONE)
+ZONE_ENUMS = (CardClass, CardType, Race, Rarity, Zone)
+
+
+def depends_on_zones_only(value):
+	"""
+	Returns whether \a value (a selector, lazy value or aura tag value)
+	always evaluates to the same result as long as no entity changes zone.
+	Anything unknown is assumed to depend on the rest of the game state.
+	"""
+	if value is None or value is SELF or value is OWNER:
+		return True
+	if isinstance(value, SetOpSelector):
+		return depends_on_zones_only(value.left) and depends_on_zones_only(value.right)
+	if isinstance(value, (SliceSelector, BoardPositionSelector)):
+		return depends_on_zones_only(value.child)
+	if isinstance(value, EnumSelector):
+		return isinstance(value.tag_enum, ZONE_ENUMS)
+	if isinstance(value, ComparisonSelector):
+		if not isinstance(value.left, AttrValue) or value.left.tag not in ZONE_TAGS:
+			return False
+		return depends_on_zones_only(value.right)
+	if isinstance(value, Controller):
+		return depends_on_zones_only(value.child)
+	if isinstance(value, Count):
+		return depends_on_zones_only(value.selector)
+	if isinstance(value, (Selector, LazyValue)):
+		return False
+	# Plain ints and enums, and callables which are evaluated on every read
+	return isinstance(value, int) or callable(value)
+
+
 FRIENDLY = CONTROLLER == Controller()
 ENEMY = CONTROLLER == Opponent()
 
@@ -3,9 +3,31 @@ import uuid
 from hearthstone.enums import CardType
 
 from . import logging
+from .utils import copy_attributes, copy_value
+
+
+_slots = {}
+
+
+def _get_slots(cls):
+	"""
+	Returns the descriptors of the slots \a cls and its bases define
+	"""
+	ret = _slots.get(cls)
+	if ret is None:
+		ret = _slots[cls] = [
+			base.__dict__[name] for base in cls.__mro__
+			for name in base.__dict__.get("__slots__", ())
+			if name not in ("__dict__", "__weakref__")
+		]
+	return ret
 
 
 class BaseEntity(object):
+	# Attributes every entity has, kept out of the instance dict
+	__slots__ = (
+		"__dict__", "__weakref__", "data", "manager", "tags", "play_counter", "_events", "_uuid",
+	)
 	base_events = []
 	logger = logging.log
 	ignore_scripts = False
@@ -15,7 +37,7 @@ class BaseEntity(object):
 		self.manager = self.Manager(self)
 		self.play_counter = 0
 		self.tags = self.manager
-		self.uuid = uuid.uuid4()
+		self._uuid = None
 
 		if self.data:
 			self._events = self.data.scripts.events[:]
@@ -25,6 +47,36 @@ class BaseEntity(object):
 	def __int__(self):
 		return self.entity_id
 
+	def __deepcopy__(self, memo):
+		# Cloning games (eg. for search) is dominated by copying entities
+		ret = self.__class__.__new__(self.__class__)
+		memo[id(self)] = ret
+		self._copy_state(ret, memo)
+		return ret
+
+	def _copy_state(self, ret, memo, exclude=()):
+		"""
+		Deep copies the attributes of the entity into \a ret, an entity of
+		the same class, apart from those named in \a exclude.
+		"""
+		cls = self.__class__
+		for slot in _get_slots(cls):
+			if slot.__name__ in exclude:
+				continue
+			try:
+				value = slot.__get__(self, cls)
+			except AttributeError:
+				continue
+			slot.__set__(ret, copy_value(value, memo))
+		copy_attributes(self, ret, memo, exclude)
+
+	@property
+	def uuid(self):
+		# Generated on first use, most entities never need one
+		if self._uuid is None:
+			self._uuid = uuid.uuid4()
+		return self._uuid
+
 	@property
 	def is_card(self):
 		"""
@@ -36,11 +88,33 @@ class BaseEntity(object):
 	def events(self):
 		return self.base_events + self._events
 
+	@property
+	def potential_events(self):
+		"""
+		Every event listener the entity may have until it changes zone or
+		its own listeners change. Used to index event listeners, see
+		BaseGame.event_listeners().
+		"""
+		return self.events
+
 	@property
 	def update_scripts(self):
 		if self.data and not self.ignore_scripts:
 			yield from self.data.scripts.update
 
+	def clear_attribute_cache(self):
+		"""
+		Called when something the computed attributes of the entity (or
+		of the entity it buffs) depend on changes.
+		"""
+		pass
+
+	def _cached_attr(self, key):
+		return None
+
+	def _cache_attr(self, key, value):
+		pass
+
 	def log(self, message, *args):
 		self.logger.info(message, *args)
 
@@ -73,6 +147,7 @@ class BaseEntity(object):
 		ret = source.game.trigger(self, actions, args)
 		if event.once:
 			self._events.remove(event)
+			self.game.invalidate_event_listeners()
 
 		return ret
 
@@ -87,20 +162,69 @@ class BaseEntity(object):
 
 
 class BuffableEntity(BaseEntity):
+	__slots__ = ("buffs", "slots", "_attr_cache", "_attr_cache_tick")
+
 	def __init__(self):
 		super().__init__()
 		self.buffs = []
 		self.slots = []
+		self.clear_attribute_cache()
+
+	def clear_attribute_cache(self):
+		self._attr_cache = {}
+		self._attr_cache_tick = None
+
+	def _cached_attr(self, key):
+		"""
+		Returns the cached value of a computed attribute, or None.
+		The cache only lives until the next aura refresh, and is cleared
+		whenever buffs, aura slots or the entity's own values change.
+		Nothing is cached for entities outside of a game (eg. a card no
+		player controls), which always get None: the checks against the
+		game's check_attribute_cache are never reached for them either.
+		"""
+		try:
+			tick = self.game.tick
+		except AttributeError:
+			self._attr_cache_tick = None
+			return None
+		if self._attr_cache_tick != tick:
+			self._attr_cache = {}
+			self._attr_cache_tick = tick
+			return None
+		return self._attr_cache.get(key)
+
+	def _cache_attr(self, key, value):
+		self._attr_cache[key] = value
 
 	def _getattr(self, attr, i):
+		key = (attr, i)
+		ret = self._cached_attr(key)
+		if ret is None or self.game.check_attribute_cache:
+			value, cacheable = self._compute_attr(attr, i)
+			if ret is not None:
+				assert ret == value, "Cached %s of %r is %r, should be %r" % (attr, self, ret, value)
+			ret = value
+			if cacheable:
+				self._cache_attr(key, ret)
+		return ret
+
+	def _compute_attr(self, attr, i):
+		"""
+		Returns the value of \a attr with all buffs applied, and whether it
+		can be cached: aura slots may hold callables reading other values.
+		"""
+		cacheable = True
 		i += getattr(self, "_" + attr, 0)
 		for buff in self.buffs:
 			i = buff._getattr(attr, i)
 		for slot in self.slots:
+			if callable(getattr(slot, attr, None)):
+				cacheable = False
 			i = slot._getattr(attr, i)
 		if self.ignore_scripts:
-			return i
-		return getattr(self.data.scripts, attr, lambda s, x: x)(self, i)
+			return i, cacheable
+		return getattr(self.data.scripts, attr, lambda s, x: x)(self, i), cacheable
 
 	def clear_buffs(self):
 		if self.buffs:
@@ -110,7 +234,7 @@ class BuffableEntity(BaseEntity):
 
 
 class Entity(BuffableEntity):
-	pass
+	__slots__ = ()
 
 
 def slot_property(attr, f=any):
@@ -121,8 +245,7 @@ def slot_property(attr, f=any):
 
 
 def boolean_property(attr):
-	@property
-	def func(self):
+	def compute(self):
 		return (
 			getattr(self, "_" + attr, False) or
 			any(getattr(buff, attr, False) for buff in self.buffs) or
@@ -130,9 +253,21 @@ def boolean_property(attr):
 			getattr(self.data.scripts, attr, lambda s, x: x)(self, False)
 		)
 
+	@property
+	def func(self):
+		ret = self._cached_attr(attr)
+		if ret is None:
+			ret = compute(self)
+			self._cache_attr(attr, ret)
+		elif self.game.check_attribute_cache:
+			value = compute(self)
+			assert ret == value, "Cached %s of %r is %r, should be %r" % (attr, self, ret, value)
+		return ret
+
 	@func.setter
 	def func(self, value):
 		setattr(self, "_" + attr, value)
+		self.clear_attribute_cache()
 
 	return func
 
@@ -146,5 +281,6 @@ def int_property(attr):
 	@func.setter
 	def func(self, value):
 		setattr(self, "_" + attr, value)
+		self.clear_attribute_cache()
 
 	return func
@@ -5,22 +5,52 @@ from itertools import chain
 
 from hearthstone.enums import BlockType, CardType, PlayState, State, Step, Zone
 
+from . import serialization
 from .actions import Attack, BeginTurn, Death, EndTurn, EventListener, Play
 from .card import THE_COIN
-from .entity import Entity
+from .dsl.selector import SelectionCache
+from .entity import Entity, _get_slots
 from .exceptions import GameOver
-from .managers import GameManager
-from .utils import CardList
+from .managers import GameManager, SimulationGameManager
+from .templates import GameTemplate
+from .utils import CardList, zone_view
 
 
 class BaseGame(Entity):
 	type = CardType.GAME
 	MAX_MINIONS_ON_FIELD = 7
 	Manager = GameManager
-
-	def __init__(self, players):
+	# Debugging aid: have process_deaths() also scan every live entity and
+	# fail if the result differs from the death checks queued by the cards
+	check_all_deaths = False
+	# Debugging aid: recompute cached entity attributes on every read and
+	# fail if they differ, see BuffableEntity._cached_attr()
+	check_attribute_cache = False
+	# Skip re-evaluating auras which cannot have changed since the last
+	# refresh. Set to False to run every aura on every refresh.
+	incremental_auras = True
+	# Reuse the results of selectors over the game which only depend on
+	# zones until the next zone move, see SelectionCache.
+	memoize_selectors = True
+	# Create the starting cards of games with the same decks only once and
+	# copy them into each new game, see GameTemplate.
+	use_templates = False
+
+	def __init__(self, players, seed=None, simulation=False):
 		self.data = None
 		self.players = players
+		# Simulated games (eg. search rollouts) skip the bookkeeping only
+		# observers, logs and the UI need. The rules are left untouched.
+		self.simulation = simulation
+		if simulation:
+			self.Manager = SimulationGameManager
+		# Every random outcome of the game is drawn from self.random. Without
+		# a seed, one is drawn from the random module, so seeding it keeps
+		# making games reproducible.
+		if seed is None:
+			seed = random.getrandbits(64)
+		self.seed = seed
+		self.random = random.Random(seed)
 		super().__init__()
 		for player in players:
 			player.game = self
@@ -33,6 +63,12 @@ class BaseGame(Entity):
 		self.active_aura_buffs = CardList()
 		self.setaside = CardList()
 		self._action_stack = 0
+		self.selection_cache = SelectionCache(self)
+		# Incremented on every zone move, see BaseCard._set_zone()
+		self._zone_version = 0
+		self._aura_cache = {}
+		self._death_checks = {}
+		self.invalidate_event_listeners()
 
 	def __repr__(self):
 		return "%s(players=%r)" % (self.__class__.__name__, self.players)
@@ -44,37 +80,67 @@ class BaseGame(Entity):
 	def game(self):
 		return self
 
-	@property
+	@zone_view
 	def board(self):
-		return CardList(chain(self.players[0].field, self.players[1].field))
+		return chain(self.players[0].field, self.players[1].field)
 
-	@property
+	@zone_view
 	def decks(self):
-		return CardList(chain(self.players[0].deck, self.players[1].deck))
+		return chain(self.players[0].deck, self.players[1].deck)
 
 	@property
 	def discarded(self):
 		return CardList(chain(self.players[0].discarded, self.players[1].discarded))
 
-	@property
+	@zone_view
 	def hands(self):
-		return CardList(chain(self.players[0].hand, self.players[1].hand))
+		return chain(self.players[0].hand, self.players[1].hand)
 
-	@property
+	@zone_view
 	def characters(self):
-		return CardList(chain(self.players[0].characters, self.players[1].characters))
+		return chain(self.players[0].characters, self.players[1].characters)
 
-	@property
+	@zone_view
 	def graveyard(self):
-		return CardList(chain(self.players[0].graveyard, self.players[1].graveyard))
+		return chain(self.players[0].graveyard, self.players[1].graveyard)
 
-	@property
+	@zone_view
 	def entities(self):
-		return CardList(chain([self], self.players[0].entities, self.players[1].entities))
+		return chain([self], self.players[0].entities, self.players[1].entities)
 
-	@property
+	@zone_view
 	def live_entities(self):
-		return CardList(chain(self.players[0].live_entities, self.players[1].live_entities))
+		return chain(self.players[0].live_entities, self.players[1].live_entities)
+
+	def event_listeners(self, action_class, hands=False):
+		"""
+		Returns the entities in play (or in hand if \a hands is True) which
+		may have an event listener triggering on \a action_class, in the
+		order broadcasts visit them. The lists are cached until the next
+		zone move or event listener change.
+		"""
+		if self._event_listeners_version != self._zone_version:
+			self.invalidate_event_listeners()
+		key = (action_class, hands)
+		ret = self._event_listeners.get(key)
+		if ret is None:
+			ret = self._event_listeners[key] = [
+				entity for entity in (self.hands if hands else self.entities)
+				if any(isinstance(event.trigger, action_class) for event in entity.potential_events)
+			]
+		return ret
+
+	def invalidate_zone_views(self):
+		"""
+		Drops the cached zone views (see zone_view) and everything cached
+		until the next zone move. Zone moves do this on their own, it is
+		only needed after reordering a zone in place.
+		"""
+		self._zone_version += 1
+
+	def invalidate_event_listeners(self):
+		self._event_listeners = {}
+		self._event_listeners_version = self._zone_version
 
 	@property
 	def minions_killed_this_turn(self):
@@ -98,7 +164,8 @@ class BaseGame(Entity):
 		if type != BlockType.PLAY:
 			self._action_stack -= 1
 		if not self._action_stack:
-			self.log("Empty stack, refreshing auras and processing deaths")
+			if self.logger.enabled:
+				self.log("Empty stack, refreshing auras and processing deaths")
 			self.refresh_auras()
 			self.process_deaths()
 
@@ -133,12 +200,30 @@ class BaseGame(Entity):
 		actions = [Play(card, target, index, choose)]
 		return self.action_block(player, actions, type, index, target)
 
+	def queue_death_check(self, entity):
+		"""
+		Have the next process_deaths() check whether \a entity has to be
+		destroyed. Called when its damage, health or destroy flag changes.
+		"""
+		if entity.zone == Zone.PLAY:
+			self._death_checks[id(entity)] = entity
+
 	def process_deaths(self):
 		type = BlockType.DEATHS
 		cards = []
-		for card in self.live_entities:
-			if card.to_be_destroyed:
-				cards.append(card)
+		checks = self._death_checks
+		if checks:
+			self._death_checks = {}
+			# Still go through live_entities, for the death order
+			for card in self.live_entities:
+				if id(card) in checks and card.to_be_destroyed:
+					cards.append(card)
+
+		if self.check_all_deaths:
+			expected = [card for card in self.live_entities if card.to_be_destroyed]
+			assert list(map(id, cards)) == list(map(id, expected)), (
+				"Queued death checks found %r, full scan found %r" % (cards, expected)
+			)
 
 		actions = []
 		if cards:
@@ -218,6 +303,7 @@ class BaseGame(Entity):
 				else:
 					listener = source
 				listener._events.append(action)
+				self.invalidate_event_listeners()
 			else:
 				ret.append(action.trigger(source))
 		return ret
@@ -242,8 +328,11 @@ class BaseGame(Entity):
 
 		# Sort the refresh queue by refresh priority (used by eg. Lightspawn)
 		refresh_queue.sort(key=lambda e: getattr(e[1], "priority", 50))
-		for entity, action in refresh_queue:
-			action.trigger(entity)
+		if self.incremental_auras:
+			self._refresh_auras_incremental(refresh_queue)
+		else:
+			for entity, action in refresh_queue:
+				action.trigger(entity)
 
 		buffs_to_destroy = []
 		for buff in self.active_aura_buffs:
@@ -254,6 +343,31 @@ class BaseGame(Entity):
 
 		self.tick += 1
 
+	def _refresh_auras_incremental(self, refresh_queue):
+		"""
+		Auras whose selector and tag values only depend on zones (see
+		Refresh.zone_dependent) are only triggered again after a zone move.
+		Until then, the buffs they refreshed last time are kept alive as is.
+		Every other update script is triggered on every refresh.
+		"""
+		cache = {}
+		for entity, action in refresh_queue:
+			if not getattr(action, "zone_dependent", False):
+				action.trigger(entity)
+				continue
+			# Cards compare equal by id, so look entities up by identity
+			key = (id(entity), id(action))
+			cached = self._aura_cache.get(key)
+			if cached and cached[0] is entity and cached[1] == self._zone_version:
+				for buff in cached[2]:
+					buff.tick = self.tick
+			else:
+				cached = (entity, self._zone_version, action.trigger(entity))
+			cache[key] = cached
+		# Only keep the auras still active, the others have to be re-evaluated
+		# if they ever come back
+		self._aura_cache = cache
+
 	def setup(self):
 		self.log("Setting up game %r", self)
 		self.state = State.RUNNING
@@ -264,6 +378,11 @@ class BaseGame(Entity):
 		for player in self.players:
 			player.zone = Zone.PLAY
 			self.manager.new_entity(player)
+		# Templates are taken before the coin toss, other games create their
+		# starting cards after it, with each player's shuffle and deal
+		use_template = self.use_templates and not self.manager.observers
+		if use_template:
+			GameTemplate.get(self).apply(self)
 
 		first, second = self.pick_first_player()
 		self.player1 = first
@@ -272,9 +391,48 @@ class BaseGame(Entity):
 		self.player2.first_player = False
 
 		for player in self.players:
+			if not use_template:
+				player.create_starting_cards()
 			player.prepare_for_game()
 		self.manager.start_game()
 
+	def to_bytes(self) -> bytes:
+		"""
+		Returns a compact binary snapshot of the game, which from_bytes()
+		turns back into a game that can be played on.
+		"""
+		return serialization.to_bytes(self)
+
+	@classmethod
+	def from_bytes(cls, data: bytes) -> "BaseGame":
+		ret = serialization.from_bytes(data)
+		if not isinstance(ret, cls):
+			raise TypeError("%r is not a snapshot of a %s" % (ret, cls.__name__))
+		return ret
+
+	def dispose(self):
+		"""
+		Tears down a game which is no longer needed, such as a search clone.
+		The game, its players and its cards all refer to each other, which
+		would leave them to the cycle collector. Clearing them lets them be
+		freed as soon as the game is dropped. The game cannot be used after.
+		"""
+		entities = {id(self): self}
+		stack = [*self.players, *self]
+		while stack:
+			entity = stack.pop()
+			if id(entity) not in entities:
+				entities[id(entity)] = entity
+				stack.extend(getattr(entity, "buffs", ()))
+		for entity in entities.values():
+			cls = entity.__class__
+			for slot in _get_slots(cls):
+				try:
+					slot.__delete__(entity)
+				except AttributeError:
+					pass
+			entity.__dict__.clear()
+
 	def start(self):
 		self.setup()
 		self.begin_turn(self.player1)
@@ -311,7 +469,8 @@ class BaseGame(Entity):
 		for p in self.players:
 			p.cards_drawn_this_turn = 0
 
-		player.turn_start = timegm(time.gmtime())
+		if not self.simulation:
+			player.turn_start = timegm(time.gmtime())
 		player.cards_played_this_turn = 0
 		player.minions_played_this_turn = 0
 		player.minions_killed_this_turn = 0
@@ -340,7 +499,7 @@ class CoinRules:
 	The second player gets "The Coin" (GAME_005).
 	"""
 	def pick_first_player(self):
-		winner = random.choice(self.players)
+		winner = self.random.choice(self.players)
 		self.log("Tossing the coin... %s wins!", winner)
 		return winner, winner.opponent
 
@@ -1,4 +1,9 @@
 import logging
+from collections import deque
+
+
+# Logger methods replaced in simulation mode
+LOG_METHODS = {"debug": logging.DEBUG, "info": logging.INFO, "warning": logging.WARNING}
 
 
 def get_logger(name, level=logging.DEBUG):
@@ -20,4 +25,56 @@ def get_logger(name, level=logging.DEBUG):
 	return logger
 
 
+class EventBuffer(deque):
+	"""
+	Ring buffer of the last log events, kept as unformatted
+	(level, message, args) tuples. The args are stored as is, so entities
+	are only formatted, in their current state, when dumped.
+	"""
+	def dump(self):
+		return [
+			"%s: %s" % (logging.getLevelName(level), message % args)
+			for level, message, args in self
+		]
+
+
+def _discard(message, *args, **kwargs):
+	pass
+
+
+def _recorder(events, level):
+	def record(message, *args, **kwargs):
+		events.append((level, message, args))
+	return record
+
+
+def simulation_mode(enabled=True, buffer_size=0):
+	"""
+	Switch the fireplace logger to simulation mode, in which nothing is
+	formatted nor emitted. The hot call sites check log.enabled first and
+	skip the call and its arguments entirely. With \a buffer_size, the last
+	log events are kept instead in log.events for post-mortem debugging.
+	Call with \a enabled False to restore normal logging.
+	"""
+	for name in LOG_METHODS:
+		log.__dict__.pop(name, None)
+	log.enabled = True
+	log.events = None
+
+	if not enabled:
+		return
+
+	if buffer_size:
+		log.events = EventBuffer(maxlen=buffer_size)
+		for name, level in LOG_METHODS.items():
+			setattr(log, name, _recorder(log.events, level))
+	else:
+		log.enabled = False
+		for name in LOG_METHODS:
+			setattr(log, name, _discard)
+
+
 log = get_logger("fireplace")
+# Checked by the hot logging call sites, see simulation_mode()
+log.enabled = True
+log.events = None
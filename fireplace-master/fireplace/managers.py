@@ -1,13 +1,38 @@
+from weakref import ref
+
 from hearthstone.enums import GameTag
 
 from . import enums
+from .utils import copy_attributes, copy_value
 
 
 class Manager(object):
 	def __init__(self, obj):
-		self.obj = obj
+		# Entities hold their manager, which only refers back to them weakly
+		# so that each entity is not a reference cycle of its own
+		self._obj = ref(obj)
 		self.observers = []
 
+	@property
+	def obj(self):
+		return self._obj()
+
+	def __deepcopy__(self, memo):
+		ret = self.__class__.__new__(self.__class__)
+		memo[id(self)] = ret
+		copy_attributes(self, ret, memo, exclude=("_obj", ))
+		ret._obj = ref(copy_value(self.obj, memo))
+		return ret
+
+	def __getstate__(self):
+		ret = self.__dict__.copy()
+		ret["_obj"] = self.obj
+		return ret
+
+	def __setstate__(self, state):
+		self.__dict__.update(state)
+		self._obj = ref(self._obj)
+
 	def __getitem__(self, tag):
 		if self.map.get(tag):
 			return getattr(self.obj, self.map[tag], 0)
@@ -86,6 +111,36 @@ class GameManager(Manager):
 			observer.turn(player)
 
 
+class SimulationGameManager(GameManager):
+	"""
+	Game manager of simulated games, which nobody observes: only the
+	entity ids and steps the rules rely on are kept up to date.
+	"""
+	def register(self, observer):
+		raise RuntimeError("Simulated games cannot be observed")
+
+	def action_start(self, type, source, index, target):
+		pass
+
+	def action_end(self, type, source):
+		pass
+
+	def new_entity(self, entity):
+		self.counter += 1
+		entity.entity_id = self.counter
+
+	def start_game(self):
+		pass
+
+	def step(self, step, next_step=None):
+		self.obj.step = step
+		if next_step is not None:
+			self.obj.next_step = next_step
+
+	def turn(self, player):
+		pass
+
+
 class BaseObserver:
 	def action_start(self, type, source, index, target):
 		pass
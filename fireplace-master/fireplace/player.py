@@ -1,4 +1,5 @@
-import random
+from collections import namedtuple
+from enum import IntEnum
 from itertools import chain
 
 from hearthstone.enums import CardType, PlayState, Zone
@@ -9,7 +10,27 @@ from .card import Card
 from .deck import Deck
 from .entity import Entity, slot_property
 from .managers import PlayerManager
-from .utils import CardList
+from .utils import CardList, zone_view
+
+
+class LegalAction(
+	namedtuple("LegalAction", ("type", "index", "card", "choice", "targets"))
+):
+	"""
+	A move available to a player, see Player.legal_actions().
+	\a index is the position of \a card in the hand, on the field or in the
+	pending choice (None for the hero, the hero power and ending the turn).
+	\a choice is the position of the picked card in a Choose One card's
+	choose_cards, and \a targets the targets the move requires (if any).
+	"""
+	__slots__ = ()
+
+	class Type(IntEnum):
+		PLAY = 1
+		ATTACK = 2
+		HERO_POWER = 3
+		CHOOSE = 4
+		END_TURN = 5
 
 
 class Player(Entity, TargetableByAuras):
@@ -105,11 +126,11 @@ class Player(Entity, TargetableByAuras):
 			return self._start_hand_size + 1
 		return self._start_hand_size
 
-	@property
+	@zone_view
 	def characters(self):
-		return CardList(chain([self.hero] if self.hero else [], self.field))
+		return chain([self.hero] if self.hero else [], self.field)
 
-	@property
+	@zone_view
 	def entities(self):
 		for entity in self.field:
 			yield from entity.entities
@@ -119,7 +140,7 @@ class Player(Entity, TargetableByAuras):
 			yield from self.hero.entities
 		yield self
 
-	@property
+	@zone_view
 	def live_entities(self):
 		yield from self.field
 		if self.hero:
@@ -134,6 +155,55 @@ class Player(Entity, TargetableByAuras):
 		if self.hero.power:
 			yield self.hero.power
 
+	def legal_actions(self):
+		"""
+		Returns all the moves the player can make as a list of LegalAction:
+		plays from the hand (one per choice for Choose One cards), attacks
+		from the field, the hero power, the hero's attack and ending the
+		turn. A pending choice has to be made before anything else.
+		"""
+		Type = LegalAction.Type
+		ret = []
+		if self.choice:
+			for index, card in enumerate(self.choice.cards):
+				ret.append(LegalAction(Type.CHOOSE, index, card, None, []))
+			return ret
+		if not self.current_player:
+			return ret
+
+		for index, card in enumerate(self.hand):
+			if not card.is_playable():
+				continue
+			if card.must_choose_one:
+				# The picked card decides whether the play needs a target
+				plays = [
+					(choice, c.requires_target()) for choice, c in enumerate(card.choose_cards)
+				]
+			else:
+				plays = [(None, card.requires_target())]
+			for choice, requires_target in plays:
+				targets = card.play_targets if requires_target else []
+				if requires_target and not targets:
+					continue
+				ret.append(LegalAction(Type.PLAY, index, card, choice, targets))
+
+		for index, minion in enumerate(self.field):
+			if minion.can_attack():
+				ret.append(LegalAction(Type.ATTACK, index, minion, None, minion.attack_targets))
+
+		power = self.hero.power
+		if power and power.is_usable():
+			requires_target = power.requires_target()
+			targets = power.play_targets if requires_target else []
+			if targets or not requires_target:
+				ret.append(LegalAction(Type.HERO_POWER, None, power, None, targets))
+
+		if self.hero.can_attack():
+			ret.append(LegalAction(Type.ATTACK, None, self.hero, None, self.hero.attack_targets))
+
+		ret.append(LegalAction(Type.END_TURN, None, None, None, []))
+		return ret
+
 	@property
 	def minion_slots(self):
 		return max(0, self.game.MAX_MINIONS_ON_FIELD - len(self.field))
@@ -151,16 +221,18 @@ class Player(Entity, TargetableByAuras):
 		self.game.manager.new_entity(card)
 		return card
 
-	def prepare_for_game(self):
+	def create_starting_cards(self):
 		self.summon(self.starting_hero)
 		for id in self.starting_deck:
 			self.card(id, zone=Zone.DECK)
+
+	def prepare_for_game(self):
 		self.shuffle_deck()
 		self.playstate = PlayState.PLAYING
 
 		# Draw initial hand (but not any more than what we have in the deck)
 		hand_size = min(len(self.deck), self.start_hand_size)
-		starting_hand = random.sample(self.deck, hand_size)
+		starting_hand = self.game.random.sample(self.deck, hand_size)
 		# It's faster to move cards directly to the hand instead of drawing
 		for card in starting_hand:
 			card.zone = Zone.HAND
@@ -209,7 +281,14 @@ class Player(Entity, TargetableByAuras):
 
 	def shuffle_deck(self):
 		self.log("%r shuffles their deck", self)
-		random.shuffle(self.deck)
+		self.game.random.shuffle(self.deck)
+		# The deck order changed without any zone move
+		self.game.invalidate_zone_views()
+
+	def shuffle_hand(self):
+		self.log("%r shuffles their hand", self)
+		self.game.random.shuffle(self.hand)
+		self.game.invalidate_zone_views()
 
 	def draw(self, count=1):
 		if self.cant_draw:
@@ -0,0 +1,519 @@
+"""
+Binary snapshots of games, see BaseGame.to_bytes().
+
+A snapshot is a header followed by:
+	- The string table: card ids, attribute names, class paths, ...
+	- The entity table: the class of every entity of the game.
+	- The tokens (int16 when they all fit, int32 otherwise).
+	- The words of the random states.
+
+The tokens hold the state of every entity, in table order: its slots,
+then the values of its attributes. The attribute names of an entity are
+a "shape" stored once and shared with the entities of the same layout.
+Cards only store the attributes which differ from those of a new card
+with the same id. Zones (decks, hands, fields, ...) are lists of entity
+indices.
+
+Each value is a token holding a type code in its low bits and an int,
+string index, entity index or length in its high bits, followed by
+its contents if any. Script objects from the card definitions (event
+listeners, actions, selectors) are stored as a card id and a position
+in the definition of that card. They are shared with the card data of the
+process loading the snapshot, as they are with the cards of a new game.
+
+Caches (zone views, attribute caches, selection caches, ...) are left
+out and rebuilt on demand. Observers registered on the game's managers
+and entity uuids are not kept.
+"""
+import random
+from array import array
+from enum import Enum
+from importlib import import_module
+from types import FunctionType, MethodType
+
+from hearthstone.cardxml import CardXML
+from hearthstone.enums import CardType
+
+from . import cards
+from .actions import GenericChoice, MulliganChoice
+from .dsl.selector import SelectionCache
+from .entity import BaseEntity, _get_slots
+from .managers import Manager
+from .utils import CardList
+
+
+MAGIC = b"FPGS"
+VERSION = 1
+
+(
+	NONE, FALSE, TRUE, INT, BIGINT, FLOAT, STR, ENUM, ENTITY, REF, LIST, TUPLE, DICT,
+	SEQ, OBJECT, SCRIPT, METHOD, CLASS, MANAGER, RANDOM, DATA, FUNCTION,
+) = range(22)
+CODE_BITS = 5
+CODE_MASK = (1 << CODE_BITS) - 1
+MAX_PAYLOAD = 1 << (31 - CODE_BITS)
+
+# Slots of the entities which are rebuilt instead of stored
+TRANSIENT_SLOTS = ("manager", "tags", "_attr_cache", "_attr_cache_tick", "_uuid")
+# Attributes of the entities which are rebuilt instead of stored, along with
+# the zone views (named _view_*)
+TRANSIENT_ATTRIBUTES = (
+	"selection_cache", "_aura_cache", "_event_listeners", "_event_listeners_version",
+)
+# Script objects holding the state of a pending choice. They are stored
+# whole instead of as references to the card definitions.
+CHOICES = (GenericChoice, MulliganChoice)
+
+
+##
+# Script objects of the card definitions
+
+# card id -> script objects in definition order
+_script_objects = {}
+# id(script object) -> (card id, index)
+_script_index = {}
+
+
+def get_script_objects(card_id):
+	"""
+	Returns the objects making up the scripts of \a card_id, in an order
+	which only depends on the card definitions.
+	"""
+	ret = _script_objects.get(card_id)
+	if ret is not None:
+		return ret
+	ret = _script_objects[card_id] = []
+	seen = set()
+
+	def walk(value):
+		if value is None or value.__class__ in (bool, int, float, str) or isinstance(value, Enum):
+			return
+		if id(value) in seen or isinstance(value, BaseEntity):
+			return
+		seen.add(id(value))
+		if isinstance(value, type):
+			# The scripts class, and classes nested in card definitions (Hand)
+			if value.__module__.startswith(cards.__name__):
+				for name in sorted(dir(value)):
+					if not name.startswith("__"):
+						walk(getattr(value, name))
+		elif isinstance(value, (list, tuple)):
+			for item in value:
+				walk(item)
+		elif isinstance(value, dict):
+			for item in value.values():
+				walk(item)
+		elif not isinstance(value, (set, frozenset)):
+			_script_index.setdefault(id(value), (card_id, len(ret)))
+			ret.append(value)
+			if hasattr(value, "__dict__") and not isinstance(value, (FunctionType, MethodType)):
+				for item in list(value.__dict__.values()):
+					walk(item)
+
+	walk(cards.db[card_id].scripts)
+	return ret
+
+
+# Attributes of a new card, by card class and card id, along with the
+# names of its card lists (entourage, ...), which each card has a copy of
+_prototypes = {}
+MISSING = object()
+
+
+def get_prototype(cls, data):
+	ret = _prototypes.get((cls, data.id))
+	if ret is None:
+		values = cls(data).__dict__
+		lists = tuple(k for k, v in values.items() if v.__class__ is CardList)
+		ret = _prototypes[cls, data.id] = values, lists
+	return ret
+
+
+def _class_path(cls):
+	return "%s:%s" % (cls.__module__, cls.__qualname__)
+
+
+def _import_path(path):
+	module, qualname = path.split(":")
+	ret = import_module(module)
+	for name in qualname.split("."):
+		ret = getattr(ret, name)
+	return ret
+
+
+##
+# Encoding
+
+class Encoder:
+	def __init__(self):
+		self.tokens = []
+		self.strings = {}
+		self.entities = []
+		self.entity_index = {}
+		self.memo = {}
+		self.shapes = {}
+		self.walked_all = False
+		# Random states, which do not fit in tokens
+		self.words = array("I")
+
+	def string(self, s):
+		ret = self.strings.get(s)
+		if ret is None:
+			ret = self.strings[s] = len(self.strings)
+		return ret
+
+	def entity(self, entity):
+		ret = self.entity_index.get(id(entity))
+		if ret is None:
+			ret = self.entity_index[id(entity)] = len(self.entities)
+			self.entities.append(entity)
+			if entity.data is not None and isinstance(entity.data, CardXML):
+				get_script_objects(entity.data.id)
+		return ret
+
+	def encode_game(self, game):
+		self.entity(game)
+		i = 0
+		# Entities are added to the table as they are first referenced
+		while i < len(self.entities):
+			self.encode_entity(self.entities[i])
+			i += 1
+		classes = [self.string(_class_path(entity.__class__)) for entity in self.entities]
+		strings = [s.encode() for s in self.strings]
+		tokens = array("h")
+		try:
+			tokens.fromlist(self.tokens)
+		except OverflowError:
+			tokens = array("i", self.tokens)
+		header = [
+			len(strings), len(classes), len(self.tokens), len(self.words),
+			tokens.itemsize, game.manager.counter,
+		]
+		header += [len(s) for s in strings]
+		header += classes
+		return b"".join((
+			MAGIC, bytes((VERSION, )), array("i", header).tobytes(), b"".join(strings),
+			tokens.tobytes(), self.words.tobytes(),
+		))
+
+	def encode_entity(self, entity):
+		cls = entity.__class__
+		for slot in _get_slots(cls):
+			if slot.__name__ in TRANSIENT_SLOTS:
+				continue
+			try:
+				value = slot.__get__(entity, cls)
+			except AttributeError:
+				value = None
+			self.value(value)
+
+		# Cards only store the attributes which differ from a new card
+		data = entity.data
+		if isinstance(data, CardXML):
+			prototype, lists = get_prototype(cls, data)
+			values = entity.__dict__
+			if prototype.keys() <= values.keys():
+				self.tokens.append(1)
+				self.attributes([
+					(k, v) for k, v in values.items() if prototype.get(k, MISSING) is not v and not (
+						k in lists and v.__class__ is CardList and v == prototype[k] and not v.__dict__
+					)
+				])
+				return
+		self.tokens.append(0)
+		attrs = [
+			(k, v) for k, v in entity.__dict__.items()
+			if k not in TRANSIENT_ATTRIBUTES and not k.startswith("_view_")
+		]
+		if entity.type == CardType.GAME:
+			# Game._death_checks is keyed by the ids of the entities
+			attrs = [(k, tuple(v.values()) if k == "_death_checks" else v) for k, v in attrs]
+		self.attributes(attrs)
+
+	def attributes(self, attrs):
+		shape = tuple(k for k, v in attrs)
+		index = self.shapes.get(shape)
+		tokens = self.tokens
+		if index is None:
+			index = self.shapes[shape] = len(self.shapes)
+			tokens.append(index)
+			tokens.append(len(shape))
+			tokens.extend(self.string(k) for k in shape)
+		else:
+			tokens.append(index)
+		for k, v in attrs:
+			self.value(v)
+
+	def value(self, value):
+		cls = value.__class__
+		tokens = self.tokens
+		if cls is int:
+			if -MAX_PAYLOAD <= value < MAX_PAYLOAD:
+				tokens.append(value << CODE_BITS | INT)
+			else:
+				tokens.append(self.string(str(value)) << CODE_BITS | BIGINT)
+		elif value is None:
+			tokens.append(NONE)
+		elif cls is bool:
+			tokens.append(TRUE if value else FALSE)
+		elif cls is str:
+			tokens.append(self.string(value) << CODE_BITS | STR)
+		elif isinstance(value, BaseEntity):
+			tokens.append(self.entity(value) << CODE_BITS | ENTITY)
+		elif isinstance(value, Enum):
+			tokens.append(self.string(_class_path(cls)) << CODE_BITS | ENUM)
+			tokens.append(value.value)
+		elif cls is tuple:
+			tokens.append(len(value) << CODE_BITS | TUPLE)
+			for item in value:
+				self.value(item)
+		elif id(value) in self.memo:
+			tokens.append(self.memo[id(value)] << CODE_BITS | REF)
+		elif cls is list:
+			self.memo[id(value)] = len(self.memo)
+			tokens.append(len(value) << CODE_BITS | LIST)
+			for item in value:
+				self.value(item)
+		elif cls is dict:
+			self.memo[id(value)] = len(self.memo)
+			tokens.append(len(value) << CODE_BITS | DICT)
+			for k, v in value.items():
+				self.value(k)
+				self.value(v)
+		elif isinstance(value, CardList):
+			self.memo[id(value)] = len(self.memo)
+			tokens.append(self.string(_class_path(cls)) << CODE_BITS | SEQ)
+			tokens.append(len(value))
+			for item in value:
+				self.value(item)
+			self.attributes(list(value.__dict__.items()))
+		elif isinstance(value, CardXML):
+			tokens.append(self.string(value.id) << CODE_BITS | DATA)
+		elif cls is float:
+			tokens.append(self.string(repr(value)) << CODE_BITS | FLOAT)
+		else:
+			self.other(value)
+
+	def other(self, value):
+		tokens = self.tokens
+		cls = value.__class__
+		if isinstance(value, type):
+			tokens.append(self.string(_class_path(value)) << CODE_BITS | CLASS)
+			return
+		if isinstance(value, MethodType):
+			tokens.append(self.string(value.__name__) << CODE_BITS | METHOD)
+			self.value(value.__self__)
+			return
+		if isinstance(value, Manager):
+			tokens.append(self.string(_class_path(cls)) << CODE_BITS | MANAGER)
+			self.value(value.obj)
+			return
+		if cls is random.Random:
+			version, state, gauss_next = value.getstate()
+			tokens.append(RANDOM)
+			tokens.append(version)
+			self.words.extend(state)
+			self.value(gauss_next)
+			return
+
+		if not isinstance(value, CHOICES):
+			key = self.script_key(value)
+			if key is not None:
+				tokens.append(self.string(key[0]) << CODE_BITS | SCRIPT)
+				tokens.append(key[1])
+				return
+		if isinstance(value, FunctionType):
+			if "<" in value.__qualname__:
+				raise TypeError("Cannot serialize %r" % (value))
+			tokens.append(self.string(_class_path(value)) << CODE_BITS | FUNCTION)
+			return
+		if not hasattr(value, "__dict__"):
+			raise TypeError("Cannot serialize %r" % (value))
+		self.memo[id(value)] = len(self.memo)
+		tokens.append(self.string(_class_path(cls)) << CODE_BITS | OBJECT)
+		self.attributes(list(value.__dict__.items()))
+
+	def script_key(self, value):
+		ret = _script_index.get(id(value))
+		if ret is None and not self.walked_all:
+			# Script objects queued from a card not in the game, eg. a
+			# listener registered by a spell which has been transformed
+			self.walked_all = True
+			for card_id in cards.db:
+				get_script_objects(card_id)
+			ret = _script_index.get(id(value))
+		return ret
+
+
+def to_bytes(game) -> bytes:
+	return Encoder().encode_game(game)
+
+
+##
+# Decoding
+
+class Decoder:
+	def __init__(self, strings, tokens, words):
+		self.strings = strings
+		self.tokens = tokens
+		self.words = words
+		self.pos = 0
+		self.words_pos = 0
+		self.entities = None
+		self.objects = []
+		self.shapes = []
+		self.paths = {}
+		self.enums = {}
+
+	def next(self):
+		ret = self.tokens[self.pos]
+		self.pos += 1
+		return ret
+
+	def path(self, index):
+		ret = self.paths.get(index)
+		if ret is None:
+			ret = self.paths[index] = _import_path(self.strings[index])
+		return ret
+
+	def decode_entity(self, entity):
+		cls = entity.__class__
+		for slot in _get_slots(cls):
+			if slot.__name__ not in TRANSIENT_SLOTS:
+				slot.__set__(entity, self.value())
+		if self.next():
+			prototype, lists = get_prototype(cls, entity.data)
+			values = prototype.copy()
+			for k in lists:
+				values[k] = CardList(prototype[k])
+			values.update(self.attributes())
+			entity.__dict__.update(values)
+		else:
+			entity.__dict__.update(self.attributes())
+		entity._uuid = None
+		entity.manager = entity.tags = entity.Manager(entity)
+		if hasattr(entity, "clear_attribute_cache"):
+			entity.clear_attribute_cache()
+
+	def attributes(self):
+		index = self.next()
+		if index == len(self.shapes):
+			count = self.next()
+			self.shapes.append(tuple(self.strings[self.next()] for i in range(count)))
+		return {k: self.value() for k in self.shapes[index]}
+
+	def value(self):
+		token = self.tokens[self.pos]
+		self.pos += 1
+		code = token & CODE_MASK
+		payload = token >> CODE_BITS
+		# Most frequent first
+		if code == INT:
+			return payload
+		elif code == LIST:
+			ret = []
+			self.objects.append(ret)
+			if payload:
+				ret.extend([self.value() for i in range(payload)])
+			return ret
+		elif code == ENTITY:
+			return self.entities[payload]
+		elif code == SEQ:
+			cls = self.path(payload)
+			ret = cls.__new__(cls)
+			self.objects.append(ret)
+			ret.extend([self.value() for i in range(self.next())])
+			ret.__dict__.update(self.attributes())
+			return ret
+		elif code == ENUM:
+			key = (payload, self.next())
+			ret = self.enums.get(key)
+			if ret is None:
+				ret = self.enums[key] = self.path(payload)(key[1])
+			return ret
+		elif code == STR:
+			return self.strings[payload]
+		elif code == DATA:
+			return cards.db[self.strings[payload]]
+		elif code == NONE:
+			return None
+		elif code == FALSE:
+			return False
+		elif code == TRUE:
+			return True
+		elif code == TUPLE:
+			return tuple([self.value() for i in range(payload)])
+		elif code == REF:
+			return self.objects[payload]
+		elif code == DICT:
+			ret = {}
+			self.objects.append(ret)
+			for i in range(payload):
+				k = self.value()
+				ret[k] = self.value()
+			return ret
+		elif code == SCRIPT:
+			return get_script_objects(self.strings[payload])[self.next()]
+		elif code == OBJECT:
+			cls = self.path(payload)
+			ret = cls.__new__(cls)
+			self.objects.append(ret)
+			ret.__dict__.update(self.attributes())
+			return ret
+		elif code == METHOD:
+			return getattr(self.value(), self.strings[payload])
+		elif code == MANAGER:
+			cls = self.path(payload)
+			ret = cls.__new__(cls)
+			Manager.__init__(ret, self.value())
+			return ret
+		elif code == RANDOM:
+			version = self.next()
+			state = tuple(self.words[self.words_pos:self.words_pos + 625])
+			self.words_pos += 625
+			ret = random.Random.__new__(random.Random)
+			ret.setstate((version, state, self.value()))
+			return ret
+		elif code in (CLASS, FUNCTION):
+			return self.path(payload)
+		elif code == FLOAT:
+			return float(self.strings[payload])
+		elif code == BIGINT:
+			return int(self.strings[payload])
+		raise ValueError("Invalid token %r" % (token))
+
+
+def from_bytes(data: bytes):
+	if data[:4] != MAGIC:
+		raise ValueError("Not a game snapshot")
+	if data[4] != VERSION:
+		raise ValueError("Unsupported game snapshot version %i" % (data[4]))
+	pos = 5
+	header = array("i", data[pos:pos + 24])
+	num_strings, num_entities, num_tokens, num_words, itemsize, counter = header
+	pos += 24
+	lengths = array("i", data[pos:pos + 4 * (num_strings + num_entities)]).tolist()
+	pos += 4 * len(lengths)
+	strings = []
+	for length in lengths[:num_strings]:
+		strings.append(data[pos:pos + length].decode())
+		pos += length
+	tokens = array("h" if itemsize == 2 else "i", data[pos:pos + itemsize * num_tokens])
+	pos += itemsize * num_tokens
+	words = array("I", data[pos:pos + 4 * num_words])
+
+	decoder = Decoder(strings, tokens.tolist(), words.tolist())
+	decoder.entities = entities = []
+	for index in lengths[num_strings:]:
+		cls = decoder.path(index)
+		entities.append(cls.__new__(cls))
+	for entity in entities:
+		decoder.decode_entity(entity)
+
+	game = entities[0]
+	game._death_checks = {id(entity): entity for entity in game._death_checks}
+	game._aura_cache = {}
+	game.selection_cache = SelectionCache(game)
+	game.invalidate_event_listeners()
+	game.manager.counter = counter
+	return game
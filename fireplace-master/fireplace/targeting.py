@@ -20,6 +20,13 @@ def is_valid_target(self, target, requirements=None):
 		# Battlecries can never target themselves
 		return False
 
+	if requirements is None:
+		validator = get_validator(self)
+	else:
+		validator = compile_requirements(requirements)
+	if validator is None:
+		return False
+
 	if target.type == CardType.MINION:
 		if target.dead:
 			return False
@@ -35,58 +42,78 @@ def is_valid_target(self, target, requirements=None):
 	if target.cant_be_targeted_by_opponents and self.controller != target.controller:
 		return False
 
-	if requirements is None:
-		requirements = self.requirements
+	return validator(self, target)
+
+
+# Checks of the target requirements, called as check(source, target, param)
+REQUIREMENT_CHECKS = {
+	PlayReq.REQ_MINION_TARGET: lambda source, target, param: (
+		target.type == CardType.MINION
+	),
+	PlayReq.REQ_FRIENDLY_TARGET: lambda source, target, param: (
+		target.controller == source.controller
+	),
+	PlayReq.REQ_ENEMY_TARGET: lambda source, target, param: (
+		target.controller != source.controller
+	),
+	PlayReq.REQ_DAMAGED_TARGET: lambda source, target, param: bool(target.damage),
+	PlayReq.REQ_FROZEN_TARGET: lambda source, target, param: bool(target.frozen),
+	PlayReq.REQ_TARGET_MAX_ATTACK: lambda source, target, param: not target.atk > param,
+	PlayReq.REQ_TARGET_WITH_RACE: lambda source, target, param: (
+		target.type == CardType.MINION and target.race == param
+	),
+	PlayReq.REQ_HERO_TARGET: lambda source, target, param: target.type == CardType.HERO,
+	PlayReq.REQ_TARGET_MIN_ATTACK: lambda source, target, param: not target.atk < param,
+	PlayReq.REQ_MUST_TARGET_TAUNTER: lambda source, target, param: bool(target.taunt),
+	PlayReq.REQ_UNDAMAGED_TARGET: lambda source, target, param: not target.damage,
+	PlayReq.REQ_LEGENDARY_TARGET: lambda source, target, param: (
+		target.rarity == Rarity.LEGENDARY
+	),
+	PlayReq.REQ_TARGET_WITH_BATTLECRY: lambda source, target, param: (
+		bool(target.has_battlecry)
+	),
+	PlayReq.REQ_TARGET_WITH_DEATHRATTLE: lambda source, target, param: (
+		bool(target.has_deathrattle)
+	),
+}
 
+
+def compile_requirements(requirements):
+	"""
+	Compile the target requirements of \a requirements into a function
+	validator(source, target). Returns None if the requirements never
+	allow a target.
+	"""
 	# Check if the entity can ever target other entities
 	for req in TARGETING_PREREQUISITES:
 		if req in requirements:
 			break
 	else:
-		return False
+		return None
 
-	for req, param in requirements.items():
-		if req == PlayReq.REQ_MINION_TARGET:
-			if target.type != CardType.MINION:
-				return False
-		elif req == PlayReq.REQ_FRIENDLY_TARGET:
-			if target.controller != self.controller:
-				return False
-		elif req == PlayReq.REQ_ENEMY_TARGET:
-			if target.controller == self.controller:
-				return False
-		elif req == PlayReq.REQ_DAMAGED_TARGET:
-			if not target.damage:
-				return False
-		elif req == PlayReq.REQ_FROZEN_TARGET:
-			if not target.frozen:
-				return False
-		elif req == PlayReq.REQ_TARGET_MAX_ATTACK:
-			if target.atk > param or 0:
-				return False
-		elif req == PlayReq.REQ_TARGET_WITH_RACE:
-			if target.type != CardType.MINION or target.race != param:
-				return False
-		elif req == PlayReq.REQ_HERO_TARGET:
-			if target.type != CardType.HERO:
-				return False
-		elif req == PlayReq.REQ_TARGET_MIN_ATTACK:
-			if target.atk < param or 0:
-				return False
-		elif req == PlayReq.REQ_MUST_TARGET_TAUNTER:
-			if not target.taunt:
-				return False
-		elif req == PlayReq.REQ_UNDAMAGED_TARGET:
-			if target.damage:
-				return False
-		elif req == PlayReq.REQ_LEGENDARY_TARGET:
-			if target.rarity != Rarity.LEGENDARY:
-				return False
-		elif req == PlayReq.REQ_TARGET_WITH_BATTLECRY:
-			if not target.has_battlecry:
-				return False
-		elif req == PlayReq.REQ_TARGET_WITH_DEATHRATTLE:
-			if not target.has_deathrattle:
+	checks = tuple(
+		(REQUIREMENT_CHECKS[req], param) for req, param in requirements.items()
+		if req in REQUIREMENT_CHECKS
+	)
+
+	def validator(source, target):
+		for check, param in checks:
+			if not check(source, target, param):
 				return False
+		return True
+
+	return validator
+
 
-	return True
+def get_validator(source):
+	"""
+	Returns the compiled validator of the target requirements of \a source,
+	see compile_requirements(). It is kept on the card data, which is shared
+	by every card of the same id and by the copies of a game.
+	"""
+	data = source.data
+	try:
+		return data._target_validator
+	except AttributeError:
+		ret = data._target_validator = compile_requirements(data.requirements)
+		return ret
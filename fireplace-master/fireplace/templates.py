@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from copy import deepcopy
+
+from .utils import CardList
+
+
+class GameTemplate:
+	"""
+	A game set up up to the creation of the players' starting cards, before
+	the coin toss, the shuffle and the deal. Creating the cards is most of
+	the cost of setting up a game and does not draw from the game's random,
+	so games with the same decks can copy the cards of a single template.
+	Each copy keeps its own random, and shuffles and deals from it.
+	"""
+	# Number of templates kept, least recently used ones are dropped first
+	MAX_TEMPLATES = 64
+	_templates = OrderedDict()
+
+	def __init__(self, game):
+		self.game = deepcopy(game)
+		for player in self.game.players:
+			player.create_starting_cards()
+		self.cards = [entity for entity in self.game if entity.is_card]
+		ids = {id(card) for card in self.cards} | {id(p) for p in self.game.players}
+		self.plans = [self._plan(card, ids) for card in self.cards]
+		exclude = ("manager", "tags", "_uuid")
+		self.game_exclude = exclude + ("random", "seed", "_event_listeners") + tuple(
+			name for name in self.game.__dict__ if name.startswith("_view_")
+		)
+		self.player_exclude = exclude + tuple(
+			name for p in self.game.players for name in p.__dict__ if name.startswith("_view_")
+		)
+
+	@staticmethod
+	def key(game):
+		return (
+			game.__class__, game.simulation,
+			tuple((p.name, p.starting_hero, tuple(p.starting_deck)) for p in game.players)
+		)
+
+	@classmethod
+	def get(cls, game):
+		"""
+		Returns the template for \a game, creating it if needed.
+		"""
+		key = cls.key(game)
+		ret = cls._templates.get(key)
+		if ret is None:
+			ret = cls._templates[key] = cls(game)
+			if len(cls._templates) > cls.MAX_TEMPLATES:
+				cls._templates.popitem(last=False)
+		else:
+			cls._templates.move_to_end(key)
+		return ret
+
+	@classmethod
+	def clear(cls):
+		cls._templates.clear()
+
+	@staticmethod
+	def _plan(card, ids):
+		"""
+		Returns the attributes of \a card which refer to entities of the
+		template, as (name, is_list) pairs. Returns None if the card has any
+		other state than a freshly created card has, in which case it is
+		deep copied instead.
+		"""
+		if card.buffs or card.slots or card._uuid is not None:
+			return None
+		if len(card._events) != len(card.data.scripts.events) or any(
+			a is not b for a, b in zip(card._events, card.data.scripts.events)
+		):
+			return None
+		ret = []
+		for name, value in card.__dict__.items():
+			if id(value) in ids:
+				ret.append((name, False))
+			elif value.__class__ is CardList:
+				if not all(isinstance(item, str) or id(item) in ids for item in value):
+					return None
+				ret.append((name, True))
+			elif not isinstance(value, (int, float, str, type(None))):
+				return None
+		return ret
+
+	def apply(self, game):
+		"""
+		Copies the starting cards of the template into \a game, a game with
+		the same key at the same point of its setup. The game and its players
+		keep their identity, their managers and the game's random.
+		"""
+		template = self.game
+		memo = {}
+		for source, target in zip((template, *template.players), (game, *game.players)):
+			memo[id(source)] = target
+			memo[id(source.manager)] = target.manager
+		for card in self.cards:
+			memo[id(card)] = card.__class__.__new__(card.__class__)
+
+		for card, plan in zip(self.cards, self.plans):
+			ret = memo[id(card)]
+			if plan is None:
+				card._copy_state(ret, memo)
+				continue
+			# Same state as a new card: shared data, script listeners and
+			# tag values, with fresh containers and manager
+			ret.__dict__.update(card.__dict__)
+			for name, is_list in plan:
+				value = card.__dict__[name]
+				if is_list:
+					ret.__dict__[name] = CardList([memo.get(id(item), item) for item in value])
+				else:
+					ret.__dict__[name] = memo[id(value)]
+			ret.data = card.data
+			ret.manager = ret.tags = card.Manager(ret)
+			ret.play_counter = card.play_counter
+			ret._events = card._events[:]
+			ret._uuid = None
+			ret.buffs = []
+			ret.slots = []
+			ret.clear_attribute_cache()
+
+		# Cached views and event listeners are rebuilt on demand
+		template._copy_state(game, memo, self.game_exclude)
+		game.invalidate_event_listeners()
+		for source, target in zip(template.players, game.players):
+			source._copy_state(target, memo, self.player_exclude)
+		game.manager.counter = template.manager.counter
@@ -1,6 +1,8 @@
 import os.path
 import random
-from bisect import bisect
+from bisect import bisect, insort
+from copy import deepcopy
+from enum import Enum
 from importlib import import_module
 from pkgutil import iter_modules
 from typing import List
@@ -14,7 +16,60 @@ _cards_module = os.path.join(os.path.dirname(__file__), "cards")
 CARD_SETS = [cs for _, cs, ispkg in iter_modules([_cards_module]) if ispkg]
 
 
+# Types deepcopy() returns as is. Enum types are added the first time they are seen.
+_ATOMIC_TYPES = {type(None), bool, int, float, str}
+
+
+def copy_value(value, memo):
+	"""
+	Same as deepcopy(\a value, \a memo), without its overhead for the ints,
+	strings and enums which make up most of the state of a game.
+	"""
+	cls = value.__class__
+	if cls in _ATOMIC_TYPES:
+		return value
+	ret = memo.get(id(value))
+	if ret is not None:
+		return ret
+	if cls is list:
+		ret = memo[id(value)] = []
+		ret.extend([copy_value(item, memo) for item in value])
+		return ret
+	if cls is random.Random:
+		# Its state is a tuple of 625 ints, deepcopy() would go through each of them
+		ret = memo[id(value)] = cls.__new__(cls)
+		ret.setstate(value.getstate())
+		return ret
+	if cls is dict:
+		ret = memo[id(value)] = {}
+		ret.update({copy_value(k, memo): copy_value(v, memo) for k, v in value.items()})
+		return ret
+	if isinstance(value, Enum):
+		_ATOMIC_TYPES.add(cls)
+		return value
+	return deepcopy(value, memo)
+
+
+def copy_attributes(obj, ret, memo, exclude=()):
+	"""
+	Deep copies the instance dict of \a obj into \a ret, see copy_value().
+	The attributes named in \a exclude are left out.
+	"""
+	atomic = _ATOMIC_TYPES
+	ret.__dict__.update({
+		k: v if v.__class__ in atomic else copy_value(v, memo)
+		for k, v in obj.__dict__.items() if k not in exclude
+	})
+
+
 class CardList(list):
+	def __deepcopy__(self, memo):
+		ret = self.__class__.__new__(self.__class__)
+		memo[id(self)] = ret
+		ret.extend([copy_value(item, memo) for item in self])
+		copy_attributes(self, ret, memo)
+		return ret
+
 	def __contains__(self, x):
 		for item in self:
 			if x is item:
@@ -63,9 +118,30 @@ class CardList(list):
 		return self.__class__(e for k, v in kwargs.items() for e in self if getattr(e, k, 0) == v)
 
 
-def random_draft(card_class: CardClass, exclude=[]):
+def zone_view(func):
+	"""
+	Property caching the CardList built from \a func until the next zone
+	move in the game. The cached list is replaced, never updated, so a view
+	read before a zone move keeps its content. Views must not be modified.
+	"""
+	name = "_view_" + func.__name__
+
+	@property
+	def view(self):
+		version = self.game._zone_version
+		cached = self.__dict__.get(name)
+		if cached is not None and cached[0] == version:
+			return cached[1]
+		ret = CardList(func(self))
+		self.__dict__[name] = (version, ret)
+		return ret
+	return view
+
+
+def random_draft(card_class: CardClass, exclude=[], rng=random):
 	"""
 	Return a deck of 30 random cards for the \a card_class
+	\a rng: The random.Random instance to draw from.
 	"""
 	from . import cards
 	from .deck import Deck
@@ -89,25 +165,64 @@ def random_draft(card_class: CardClass, exclude=[]):
 		collection.append(cls)
 
 	while len(deck) < Deck.MAX_CARDS:
-		card = random.choice(collection)
+		card = rng.choice(collection)
 		if deck.count(card.id) < card.max_count_in_deck:
 			deck.append(card.id)
 
 	return deck
 
 
-def random_class():
-	return CardClass(random.randint(2, 10))
+def random_class(rng=random):
+	return CardClass(rng.randint(2, 10))
+
+
+class ScriptIndex(dict):
+	"""
+	Maps card ids to their script definition, across all the card sets.
+	When several sets define the same id, the first one in CARD_SETS wins.
+	"""
+	def __init__(self):
+		super().__init__()
+		self._with = {}
+		for cardset in CARD_SETS:
+			module = import_module("fireplace.cards.%s" % (cardset))
+			for id, definition in vars(module).items():
+				if id in self or not isinstance(definition, type):
+					continue
+				# Skip the actions, enums etc. the card modules import
+				if definition.__module__.startswith("fireplace.cards."):
+					self[id] = definition
+
+	def ids_with(self, attr):
+		"""
+		Returns the ids of the cards whose script defines \a attr
+		(eg. "update" or "events")
+		"""
+		ret = self._with.get(attr)
+		if ret is None:
+			ret = frozenset(id for id, script in self.items() if hasattr(script, attr))
+			self._with[attr] = ret
+		return ret
+
+
+_script_index = None
+
+
+def get_script_index():
+	"""
+	Returns the ScriptIndex, building it on first use
+	"""
+	global _script_index
+	if _script_index is None:
+		_script_index = ScriptIndex()
+	return _script_index
 
 
 def get_script_definition(id):
 	"""
 	Find and return the script definition for card \a id
 	"""
-	for cardset in CARD_SETS:
-		module = import_module("fireplace.cards.%s" % (cardset))
-		if hasattr(module, id):
-			return getattr(module, id)
+	return get_script_index().get(id)
 
 
 def entity_to_xml(entity):
@@ -137,47 +252,72 @@ def game_state_to_xml(game):
 	return ElementTree.tostring(tree)
 
 
-def weighted_card_choice(source, weights: List[int], card_sets: List[str], count: int):
+def weighted_sample(weights: List[int], pools, count: int, rng=random):
 	"""
-	Take a list of weights and a list of card pools and produce
-	a random weighted sample without replacement.
-	len(weights) == len(card_sets) (one weight per card set)
+	Draw \a count items without replacement from \a pools, each item of
+	pools[i] having the weight weights[i]. The pools are not modified.
+	\a rng: The random.Random instance to draw from.
 	"""
+	# Indices already drawn from each pool, sorted
+	drawn = [[] for pool in pools]
 
-	chosen_cards = []
-
-	# sum all the weights
 	cum_weights = []
 	totalweight = 0
-	for i, w in enumerate(weights):
-		totalweight += w * len(card_sets[i])
+	for weight, pool in zip(weights, pools):
+		totalweight += weight * len(pool)
 		cum_weights.append(totalweight)
 
-	# for each card
+	ret = []
 	for i in range(count):
-		# choose a set according to weighting
-		chosen_set = bisect(cum_weights, random.random() * totalweight)
+		# choose a pool according to weighting
+		chosen = bisect(cum_weights, rng.random() * totalweight)
+		pool = pools[chosen]
+		taken = drawn[chosen]
+
+		# choose a random item among the ones left, then skip over the
+		# drawn ones to find its position in the pool
+		index = rng.randint(0, len(pool) - len(taken) - 1)
+		for j in taken:
+			if j > index:
+				break
+			index += 1
+		insort(taken, index)
+		ret.append(pool[index])
 
-		# choose a random card from that set
-		chosen_card_index = random.randint(0, len(card_sets[chosen_set]) - 1)
+		weight = weights[chosen]
+		totalweight -= weight
+		for j in range(chosen, len(cum_weights)):
+			cum_weights[j] -= weight
 
-		chosen_cards.append(card_sets[chosen_set].pop(chosen_card_index))
-		totalweight -= weights[chosen_set]
-		cum_weights[chosen_set:] = [x - weights[chosen_set] for x in cum_weights[chosen_set:]]
+	return ret
 
+
+def weighted_card_choice(source, weights: List[int], card_sets: List[str], count: int):
+	"""
+	Take a list of weights and a list of card pools and produce
+	a random weighted sample without replacement.
+	len(weights) == len(card_sets) (one weight per card set)
+	"""
+	chosen_cards = weighted_sample(weights, card_sets, count, source.game.random)
 	return [source.controller.card(card, source=source) for card in chosen_cards]
 
 
-def setup_game() -> ".game.Game":
+def setup_game(seed=None, simulation=False) -> ".game.Game":
+	"""
+	Set up a game between two random decks. With \a seed, the decks and
+	the game are reproducible without seeding the random module.
+	\a simulation is passed on to the Game.
+	"""
 	from .game import Game
 	from .player import Player
 
-	deck1 = random_draft(CardClass.MAGE)
-	deck2 = random_draft(CardClass.WARRIOR)
+	rng = random if seed is None else random.Random(seed)
+	deck1 = random_draft(CardClass.MAGE, rng=rng)
+	deck2 = random_draft(CardClass.WARRIOR, rng=rng)
 	player1 = Player("Player1", deck1, CardClass.MAGE.default_hero)
 	player2 = Player("Player2", deck2, CardClass.WARRIOR.default_hero)
 
-	game = Game(players=(player1, player2))
+	game = Game(players=(player1, player2), seed=rng.getrandbits(64), simulation=simulation)
 	game.start()
 
 	return game
@@ -188,26 +328,26 @@ def play_turn(game: ".game.Game") -> ".game.Game":
 
 	while True:
 		heropower = player.hero.power
-		if heropower.is_usable() and random.random() < 0.1:
+		if heropower.is_usable() and game.random.random() < 0.1:
 			if heropower.requires_target():
-				heropower.use(target=random.choice(heropower.targets))
+				heropower.use(target=game.random.choice(heropower.targets))
 			else:
 				heropower.use()
 			continue
 
 		# iterate over our hand and play whatever is playable
 		for card in player.hand:
-			if card.is_playable() and random.random() < 0.5:
+			if card.is_playable() and game.random.random() < 0.5:
 				target = None
 				if card.must_choose_one:
-					card = random.choice(card.choose_cards)
+					card = game.random.choice(card.choose_cards)
 				if card.requires_target():
-					target = random.choice(card.targets)
+					target = game.random.choice(card.targets)
 				print("Playing %r on %r" % (card, target))
 				card.play(target=target)
 
 				if player.choice:
-					choice = random.choice(player.choice.cards)
+					choice = game.random.choice(player.choice.cards)
 					print("Choosing card %r" % (choice))
 					player.choice.choose(choice)
 
@@ -216,7 +356,7 @@ def play_turn(game: ".game.Game") -> ".game.Game":
 		# Randomly attack with whatever can attack
 		for character in player.characters:
 			if character.can_attack():
-				character.attack(random.choice(character.targets))
+				character.attack(game.random.choice(character.targets))
 
 		break
 
@@ -224,13 +364,13 @@ def play_turn(game: ".game.Game") -> ".game.Game":
 	return game
 
 
-def play_full_game() -> ".game.Game":
-	game = setup_game()
+def play_full_game(seed=None, simulation=False) -> ".game.Game":
+	game = setup_game(seed, simulation)
 
 	for player in game.players:
 		print("Can mulligan %r" % (player.choice.cards))
-		mull_count = random.randint(0, len(player.choice.cards))
-		cards_to_mulligan = random.sample(player.choice.cards, mull_count)
+		mull_count = game.random.randint(0, len(player.choice.cards))
+		cards_to_mulligan = game.random.sample(player.choice.cards, mull_count)
 		player.choice.choose(*cards_to_mulligan)
 
 	while True:
@@ -12,7 +12,7 @@ from hearthstone.enums import CardType, ChoiceType, GameTag, OptionType, Step, Z
 from fireplace import cards
 from fireplace.exceptions import GameOver
 from fireplace.game import BaseGame as Game
-from fireplace.player import Player
+from fireplace.player import LegalAction, Player
 from fireplace.utils import CardList
 
 
@@ -101,41 +101,6 @@ class KettleManager:
 		for tag in entity.tags:
 			self.refresh_tag(entity, tag)
 
-	def get_options(self, entity):
-		ret = []
-		if entity.zone == Zone.HAND:
-			if entity.type in (CardType.SPELL, CardType.MINION, CardType.WEAPON):
-				if entity.is_playable():
-					ret.append({
-						"Type": OptionType.POWER,
-						"MainOption": {
-							"ID": entity,
-							"Targets": entity.targets,
-						},
-					})
-
-		elif entity.zone == Zone.PLAY:
-			if entity.type == CardType.HERO_POWER:
-				if entity.is_usable():
-					ret.append({
-						"Type": OptionType.POWER,
-						"MainOption": {
-							"ID": entity,
-							"Targets": entity.targets,
-						}
-					})
-			elif entity.type in (CardType.HERO, CardType.MINION):
-				if entity.can_attack():
-					ret.append({
-						"Type": OptionType.POWER,
-						"MainOption": {
-							"ID": entity,
-							"Targets": entity.attack_targets,
-						}
-					})
-
-		return ret
-
 	def refresh_choices(self):
 		choice = self.game.current_player.choice
 		DEBUG("Queuing choice %r (cards: %r)", choice, choice.cards)
@@ -159,9 +124,21 @@ class KettleManager:
 			return self.refresh_choices()
 		self.options = [{"Type": OptionType.END_TURN}]
 
-		for entity in self.game.current_player.actionable_entities:
-			for option in self.get_options(entity):
-				self.options.append(option)
+		card = None
+		for action in self.game.current_player.legal_actions():
+			if action.type == LegalAction.Type.END_TURN:
+				continue
+			if action.card is card:
+				# Choose One cards are a single option
+				continue
+			card = action.card
+			self.options.append({
+				"Type": OptionType.POWER,
+				"MainOption": {
+					"ID": action.card,
+					"Targets": action.targets,
+				},
+			})
 
 		payload = {
 			"Type": "Options",
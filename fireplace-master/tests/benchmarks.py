@@ -8,11 +8,21 @@ Note that py.test will skip these by default. To run (with pytest-benchmark inst
 To increase the number of iterations, set --benchmark-min-rounds.
 """
 
+import io
+import logging
+import pickle
+import random
+
 import pytest
-from full_game import test_full_game
 from utils import *
 
 import fireplace.utils
+from fireplace import serialization
+from fireplace.card import Card
+from fireplace.exceptions import GameOver
+from fireplace.logging import simulation_mode
+from fireplace.utils import play_full_game, play_turn, random_draft, setup_game
+from hearthstone.cardxml import CardXML
 
 
 ARBITRARY_SEED = 1857
@@ -39,9 +49,205 @@ def test_selectors(benchmark):
 	benchmark(run_selector, game, alex)
 
 
-def seeded_fullgame():
-	random.seed(ARBITRARY_SEED)
-	test_full_game()
+# Selectors over the whole game, which a card script evaluates on every
+# aura refresh or play requirement check
+GAME_SELECTORS = (
+	IN_HAND + DRAGON + FRIENDLY,
+	FRIENDLY_MINIONS + BEAST - SELF,
+	ENEMY_CHARACTERS | FRIENDLY_HERO,
+	ALL_MINIONS + (PIRATE | DEMON),
+)
+
+
+def run_game_selectors(game, source):
+	for selector in GAME_SELECTORS:
+		selector.eval(game, source)
+
+
+@pytest.mark.benchmark(
+	group="selector"
+)
+@pytest.mark.parametrize("memoize", (True, False), ids=("memoized", "unmemoized"))
+def test_game_selectors(benchmark, memoize):
+	game = broadcast_game()
+	game.memoize_selectors = memoize
+	source = game.player1.hand[0]
+
+	benchmark(run_game_selectors, game, source)
+
+
+# Player1 has minions listening to Damage (Acolyte of Pain), Summon (Knife
+# Juggler) and Play (Questing Adventurer), Player2 only vanilla ones
+BROADCAST_BOARD = ("EX1_007", "NEW1_019", "EX1_044", WISP, WISP, WISP, WISP)
+
+
+def broadcast_game():
+	game = prepare_empty_game(CardClass.MAGE, CardClass.WARRIOR)
+	for id in BROADCAST_BOARD:
+		game.player1.summon(id)
+		game.player2.summon(WISP)
+	for player in game.players:
+		for id in (MOONFIRE, WISP, "EX1_561"):
+			player.give(id)
+	return game
+
+
+def run_broadcast(action, source, args):
+	# The events broadcast below all come from Player2 and do not trigger
+	# any listener, so the game state is left untouched between rounds
+	action.broadcast(source, EventListener.ON, *args)
+
+
+@pytest.mark.benchmark(
+	group="broadcast"
+)
+def test_broadcast_damage(benchmark):
+	game = broadcast_game()
+	wisp = game.player2.field[-1]
+	action = Damage(wisp, 1)
+	benchmark(run_broadcast, action, game.player1.hero, (wisp, 1, game.player1.hero))
+
+
+@pytest.mark.benchmark(
+	group="broadcast"
+)
+def test_broadcast_summon(benchmark):
+	game = broadcast_game()
+	wisp = game.player2.field[-1]
+	action = Summon(game.player2, WISP)
+	benchmark(run_broadcast, action, game.player2, (game.player2, wisp))
+
+
+@pytest.mark.benchmark(
+	group="broadcast"
+)
+def test_broadcast_play(benchmark):
+	game = broadcast_game()
+	wisp = game.player2.field[-1]
+	action = Play(game.player2, wisp, None, None, None)
+	benchmark(run_broadcast, action, game.player2, (game.player2, wisp, None))
+
+
+def run_process_deaths(game, minion):
+	# A non-lethal health change, the usual case after an action
+	minion.damage = 1 - minion.damage
+	game.process_deaths()
+
+
+@pytest.mark.benchmark(
+	group="deaths"
+)
+def test_process_deaths_large_board(benchmark):
+	game = prepare_empty_game()
+	game.MAX_MINIONS_ON_FIELD = 25
+	# Measure the queued checks alone, not the debugging full scan
+	game.check_all_deaths = False
+	for player in game.players:
+		for i in range(5):
+			# Stormwind Champion, giving every other minion a health aura
+			player.summon("CS2_222")
+		for i in range(20):
+			player.summon(WISP)
+	minion = game.player1.field[0]
+
+	benchmark(run_process_deaths, game, minion)
+
+
+def run_attribute_reads(game):
+	for minion in game.board:
+		minion.atk, minion.health, minion.cost, minion.taunt, minion.windfury
+
+
+@pytest.mark.benchmark(
+	group="attributes"
+)
+def test_attribute_reads(benchmark):
+	game = prepare_empty_game()
+	game.check_attribute_cache = False
+	for player in game.players:
+		# Stormwind Champions buffing each other and a few Wisps
+		for i in range(4):
+			player.summon("CS2_222")
+		for i in range(3):
+			player.summon(WISP)
+
+	benchmark(run_attribute_reads, game)
+
+
+# Moonfire, Fireball, Execute, Shadow Word: Pain, Big Game Hunter
+TARGETING_CARDS = (MOONFIRE, "CS2_029", "CS2_108", "CS2_234", "EX1_005")
+
+
+def run_targets(game, refresh):
+	if refresh:
+		# Targets are memoized until the next aura refresh
+		game.tick += 1
+	for card in game.player1.hand:
+		card.targets
+	game.player1.hero.power.targets
+
+
+@pytest.mark.benchmark(
+	group="targeting"
+)
+@pytest.mark.parametrize("refresh", (False, True), ids=("memoized", "refreshed"))
+def test_targets(benchmark, refresh):
+	game = prepare_empty_game()
+	game.check_attribute_cache = False
+	for player in game.players:
+		for i in range(3):
+			player.summon("CS2_222")
+			player.summon(WISP)
+	for id in TARGETING_CARDS:
+		game.player1.give(id)
+
+	benchmark(run_targets, game, refresh)
+
+
+# Card generation as done by Discover, Unstable Portal, Piloted Shredder...
+RANDOM_CARD_PICKERS = [
+	*(RandomMinion(cost=cost) for cost in range(11)),
+	RandomBeast(), RandomMech(), RandomSpell(), RandomLegendaryMinion(),
+	*(RandomCollectible(card_class=c) for c in (CardClass.MAGE, CardClass.NEUTRAL)),
+]
+
+
+def run_random_cards(source):
+	for picker in RANDOM_CARD_PICKERS:
+		picker.evaluate(source)
+
+
+@pytest.mark.benchmark(
+	group="random cards"
+)
+def test_random_cards(benchmark):
+	game = prepare_empty_game()
+	source = game.player1.summon(WISP)
+
+	benchmark(run_random_cards, source)
+
+
+ENTITY_CARDS = ("CS2_222", "EX1_561", "CS2_029", "EX1_007", "NEW1_019", "CS2_106", THE_COIN)
+
+
+def run_card_construction():
+	for id in ENTITY_CARDS:
+		Card(id)
+
+
+@pytest.mark.benchmark(
+	group="entities"
+)
+def test_card_construction(benchmark):
+	benchmark(run_card_construction)
+
+
+def seeded_fullgame(simulation=False):
+	# Seeding the game itself keeps rounds identical across processes
+	try:
+		play_full_game(ARBITRARY_SEED, simulation)
+	except GameOver:
+		pass
 
 
 @pytest.mark.benchmark(
@@ -52,6 +258,121 @@ def test_fullgame(benchmark):
 	benchmark(seeded_fullgame)
 
 
+@pytest.mark.benchmark(
+	group="logging"
+)
+@pytest.mark.parametrize("mode", ("stream", "disabled", "simulation"))
+def test_fullgame_logging(benchmark, mode):
+	# stream: the default handler, disabled: logging.disable() as alphabot
+	# used to, simulation: fireplace.logging.simulation_mode()
+	if mode == "disabled":
+		logging.disable(logging.WARNING)
+	elif mode == "simulation":
+		simulation_mode()
+	try:
+		benchmark(seeded_fullgame)
+	finally:
+		logging.disable(logging.NOTSET)
+		simulation_mode(False)
+
+
+@pytest.mark.benchmark(
+	group="rollouts"
+)
+@pytest.mark.parametrize("simulation", (False, True), ids=("game", "simulation"))
+def test_rollouts(benchmark, simulation):
+	# Full random games as search rollouts play them, OPS being rollouts/sec
+	simulation_mode()
+	try:
+		benchmark(seeded_fullgame, simulation)
+	finally:
+		simulation_mode(False)
+
+
+@pytest.mark.benchmark(
+	group="setup"
+)
+@pytest.mark.parametrize("use_templates", (False, True), ids=("fresh", "template"))
+def test_game_setup(benchmark, use_templates):
+	# Self-play episodes start games with the same decks over and over
+	rng = random.Random(ARBITRARY_SEED)
+	deck1 = random_draft(CardClass.MAGE, rng=rng)
+	deck2 = random_draft(CardClass.WARRIOR, rng=rng)
+
+	def setup():
+		player1 = Player("Player1", deck1, CardClass.MAGE.default_hero)
+		player2 = Player("Player2", deck2, CardClass.WARRIOR.default_hero)
+		game = Game(players=(player1, player2), seed=rng.getrandbits(64), simulation=True)
+		game.use_templates = use_templates
+		game.start()
+
+	simulation_mode()
+	try:
+		benchmark(setup)
+	finally:
+		simulation_mode(False)
+
+
+class SnapshotPickler(pickle.Pickler):
+	# Games cannot be pickled as is: card scripts hold lambdas and classes
+	# which only exist in the card modules, so these are pickled by id
+	def persistent_id(self, obj):
+		if isinstance(obj, CardXML):
+			return ("data", obj.id)
+		if not isinstance(obj, serialization.CHOICES):
+			key = serialization._script_index.get(id(obj))
+			if key is not None:
+				return ("script", ) + key
+		return None
+
+
+class SnapshotUnpickler(pickle.Unpickler):
+	def persistent_load(self, pid):
+		if pid[0] == "data":
+			return fireplace.cards.db[pid[1]]
+		return serialization.get_script_objects(pid[1])[pid[2]]
+
+
+def pickle_game(game):
+	f = io.BytesIO()
+	SnapshotPickler(f, pickle.HIGHEST_PROTOCOL).dump(game)
+	return f.getvalue()
+
+
+def unpickle_game(data):
+	return SnapshotUnpickler(io.BytesIO(data)).load()
+
+
+@pytest.mark.benchmark(
+	group="snapshot"
+)
+@pytest.mark.parametrize("direction", ("dump", "load"))
+@pytest.mark.parametrize("fmt", ("bytes", "pickle"))
+def test_snapshot(benchmark, fmt, direction):
+	simulation_mode()
+	try:
+		game = setup_game(ARBITRARY_SEED, simulation=True)
+		for player in game.players:
+			player.choice.choose()
+		for i in range(10):
+			play_turn(game)
+	finally:
+		simulation_mode(False)
+
+	if fmt == "bytes":
+		dump, load = Game.to_bytes, Game.from_bytes
+	else:
+		# Registers the scripts of the game's cards
+		game.to_bytes()
+		dump, load = pickle_game, unpickle_game
+	data = dump(game)
+	benchmark.extra_info["size"] = len(data)
+	if direction == "dump":
+		benchmark(dump, game)
+	else:
+		benchmark(load, data)
+
+
 @pytest.mark.benchark(
 	group="turn"
 )
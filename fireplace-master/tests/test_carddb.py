@@ -45,3 +45,40 @@ def test_card_docstrings():
 			if name.endswith(")"):
 				continue
 			assert name == card.name
+
+
+def test_script_index():
+	index = utils.fireplace.utils.get_script_index()
+	assert index["CS2_222"] is utils.fireplace.cards.classic.CS2_222
+	assert "CS2_222" in index.ids_with("update")
+	assert "CS2_222" not in index.ids_with("deathrattle")
+	assert "Refresh" not in index
+	for id in index.ids_with("events"):
+		if id in CARDS:
+			assert CARDS[id].scripts.events
+
+
+def test_shared_requirements():
+	from copy import deepcopy
+	from fireplace.card import Card
+	from fireplace.targeting import get_validator
+
+	fireball = Card("CS2_029")
+	assert fireball.requirements is Card("CS2_029").requirements
+	clone = deepcopy(fireball)
+	assert clone.data is fireball.data
+	assert get_validator(clone) is get_validator(fireball) is not None
+
+
+def test_detached_card_attributes():
+	from fireplace.card import Card
+
+	# Cards which no player controls have no game to cache attributes in
+	champion = Card("CS2_222")
+	assert (champion.atk, champion.health, champion.cost) == (6, 6, 7)
+	assert not champion.taunt
+	senjin = Card("CS2_179")
+	assert (senjin.atk, senjin.health, senjin.cost) == (3, 5, 4)
+	assert senjin.taunt
+	senjin.atk = 4
+	assert senjin.atk == 4
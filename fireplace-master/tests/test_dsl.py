@@ -194,6 +194,24 @@ def test_positional_selectors():
 	assert adjacent[1] is wisp3
 
 
+def test_selector_matches():
+	game = prepare_game()
+	wisp = game.player1.summon(WISP)
+	game.player2.summon(WISP)
+	source = game.player1.give(MOONFIRE)
+	selectors = (
+		SELF, MINION, FRIENDLY + MINION, ENEMY_CHARACTERS, MINION - SELF,
+		IN_HAND | FRIENDLY_HERO, CONTROLLER, OPPONENT, ID(WISP), ATK == 1,
+		FRIENDLY_MINIONS + (CURRENT_HEALTH == 1), LEFT_OF(SELF), SPELL - ID(MOONFIRE),
+	)
+	for selector in selectors:
+		for entity in game:
+			res = selector.eval([entity], source)
+			expected = bool(res) and res[0] is entity
+			assert selector.matches(entity, source) == expected, (selector, entity)
+	assert (FRIENDLY + MINION).matches(wisp, source)
+
+
 def test_hijack():
 	game = prepare_game()
 	vial = game.player1.give("LOEA16_8")
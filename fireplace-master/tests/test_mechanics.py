@@ -1,6 +1,7 @@
 from utils import *
 
 from fireplace.cards.utils import JOUST, Give
+from fireplace.player import LegalAction
 
 
 def test_armor():
@@ -225,6 +226,41 @@ def test_choices():
 	assert game.player1.hero.power.is_usable()
 
 
+def test_legal_actions():
+	game = prepare_game(CardClass.MAGE, CardClass.MAGE)
+	wisp = game.player1.summon(WISP)
+	game.player2.summon(WISP)
+	game.end_turn()
+	game.end_turn()
+	game.player1.discard_hand()
+	moonfire = game.player1.give(MOONFIRE)
+	explosion = game.player1.give("CS2_025")
+	wrath = game.player1.give("EX1_154")
+
+	Type = LegalAction.Type
+	actions = game.player1.legal_actions()
+	assert [(a.type, a.index, a.card, a.choice) for a in actions] == [
+		(Type.PLAY, 0, moonfire, None),
+		(Type.PLAY, 1, explosion, None),
+		(Type.PLAY, 2, wrath, 0),
+		(Type.PLAY, 2, wrath, 1),
+		(Type.ATTACK, 0, wisp, None),
+		(Type.HERO_POWER, None, game.player1.hero.power, None),
+		(Type.END_TURN, None, None, None),
+	]
+	assert actions[0].targets == moonfire.targets
+	assert len(actions[0].targets) == 4
+	assert actions[1].targets == []
+	assert actions[2].targets == wrath.play_targets
+	assert actions[4].targets == wisp.attack_targets
+	assert game.player2.legal_actions() == []
+
+	game.player1.give("DS1_184").play()
+	actions = game.player1.legal_actions()
+	assert [a.type for a in actions] == [Type.CHOOSE] * 3
+	assert [a.card for a in actions] == game.player1.choice.cards
+
+
 def test_combo():
 	game = prepare_game()
 	game.end_turn()
@@ -1,3 +1,7 @@
+import os
+import random
+
+import pytest
 from utils import *
 
 
@@ -42,3 +46,241 @@ def test_event_queue_summon():
 	assert reaver in game.player2.hand
 	assert buzzard.health == 1
 	assert len(game.player2.field) == 1
+
+
+def test_weighted_sample():
+	from fireplace.utils import weighted_sample
+	weights = [1, 3, 2]
+	pools = [("a", "b", "c"), ("d", ), ("e", "f")]
+	card_weights = {"a": 1, "b": 1, "c": 1, "d": 3, "e": 2, "f": 2}
+
+	def probability(sample, left):
+		# Exact probability of drawing the items of sample in order
+		if not sample:
+			return 1
+		total = sum(card_weights[x] for x in left)
+		first = sample[0]
+		return card_weights[first] / total * probability(sample[1:], left - {first})
+
+	rng = random.Random(1857)
+	draws = 30000
+	counts = {}
+	for i in range(draws):
+		sample = tuple(weighted_sample(weights, pools, 2, rng))
+		counts[sample] = counts.get(sample, 0) + 1
+	assert pools == [("a", "b", "c"), ("d", ), ("e", "f")]
+
+	chi2 = 0
+	for first in card_weights:
+		for second in card_weights:
+			if first == second:
+				continue
+			expected = draws * probability((first, second), set(card_weights))
+			chi2 += (counts.get((first, second), 0) - expected) ** 2 / expected
+	# 29 degrees of freedom, p = 0.001
+	assert chi2 < 58.3
+
+	assert sorted(weighted_sample(weights, pools, 6, rng)) == sorted(card_weights)
+
+
+def test_simulation_mode():
+	from fireplace.logging import log, simulation_mode
+
+	simulation_mode(buffer_size=5)
+	try:
+		assert log.enabled
+		game = prepare_game()
+		game.end_turn()
+		assert len(log.events) == 5
+		for line in log.events.dump():
+			assert isinstance(line, str)
+
+		simulation_mode()
+		assert not log.enabled
+		assert log.events is None
+		game.end_turn()
+	finally:
+		simulation_mode(False)
+	assert log.enabled
+	assert "info" not in log.__dict__
+
+
+def test_game_seed():
+	from copy import deepcopy
+	from fireplace.exceptions import GameOver
+	from fireplace.utils import play_turn, setup_game
+
+	def play(game, turns=10):
+		# The random module has no say in seeded games
+		random.seed()
+		try:
+			for i in range(turns):
+				play_turn(game)
+		except GameOver:
+			pass
+		return [(entity.id, entity.zone, entity.health) for entity in game.characters]
+
+	def seeded_game(seed):
+		game = setup_game(seed)
+		for player in game.players:
+			player.choice.choose()
+		return game
+
+	assert play(seeded_game(1857)) == play(seeded_game(1857))
+
+	# Clones carry on the random state of their game
+	game = seeded_game(42)
+	play(game, 3)
+	clone = deepcopy(game)
+	assert play(game) == play(clone)
+
+
+def test_simulation_game():
+	from fireplace.managers import BaseObserver
+	from fireplace.utils import setup_game
+
+	def play(seed, simulation):
+		game = setup_game(seed, simulation=simulation)
+		for player in game.players:
+			player.choice.choose()
+		return game_state(play_until_turn(game, 60))
+
+	for seed in range(5):
+		assert play(seed, True) == play(seed, False)
+
+	game = setup_game(simulation=True)
+	with pytest.raises(RuntimeError):
+		game.manager.register(BaseObserver())
+
+
+def test_game_templates():
+	from fireplace.brawls import HeartOfTheSunwellBrawl
+	from fireplace.templates import GameTemplate
+	from fireplace.utils import random_draft
+
+	rng = random.Random(1857)
+	decks = random_draft(CardClass.MAGE, rng=rng), random_draft(CardClass.PRIEST, rng=rng)
+
+	def new_game(cls, seed, use_templates):
+		players = (
+			Player("Player1", decks[0], CardClass.MAGE.default_hero),
+			Player("Player2", decks[1], CardClass.PRIEST.default_hero),
+		)
+		game = cls(players, seed, simulation=True)
+		game.use_templates = use_templates
+		game.start()
+		return game
+
+	def play(cls, seed, use_templates):
+		game = new_game(cls, seed, use_templates)
+		for player in game.players:
+			player.choice.choose()
+		return game_state(play_until_turn(game, 60))
+
+	GameTemplate.clear()
+	for cls in (Game, HeartOfTheSunwellBrawl):
+		for seed in range(4):
+			assert play(cls, seed, True) == play(cls, seed, False)
+	# One template per game class and deck pair
+	assert len(GameTemplate._templates) == 2
+
+	# The template itself is never shuffled nor dealt from
+	game = new_game(Game, 1, True)
+	template = GameTemplate.get(game)
+	for player, deck in zip(template.game.players, decks):
+		assert [card.id for card in player.deck] == deck
+		assert not player.hand
+	for card in game:
+		assert all(card is not c for c in template.cards)
+	GameTemplate.clear()
+
+
+def test_game_bytes():
+	from fireplace.utils import setup_game
+
+	def state(game):
+		return game_state(game), game.random.random()
+
+	for seed in range(4):
+		game = setup_game(seed, simulation=True)
+		# Snapshots can be taken with the mulligan pending
+		copy = Game.from_bytes(game.to_bytes())
+		assert copy is not game
+		for g in (game, copy):
+			for player in g.players:
+				player.choice.choose(*player.choice.cards[:1])
+		while not game.ended:
+			play_until_turn(game, game.turn + 5)
+			play_until_turn(copy, copy.turn + 5)
+			assert state(copy) == state(game)
+			data = game.to_bytes()
+			copy = Game.from_bytes(data)
+			assert copy.to_bytes() == data
+			assert not any(a is b for a, b in zip(game, copy))
+
+	with pytest.raises(ValueError):
+		Game.from_bytes(b"not a game")
+
+
+def test_dispose():
+	import gc
+	import weakref
+	from copy import deepcopy
+	from fireplace.exceptions import GameOver
+	from fireplace.logging import simulation_mode
+	from fireplace.utils import play_turn, setup_game
+
+	# Simulations as searches run them: clone, play on and drop the clone.
+	# FIREPLACE_SOAK sets how many, tox -e soak runs 10000.
+	simulations = int(os.environ.get("FIREPLACE_SOAK", 200))
+	game = setup_game(1857, simulation=True)
+	for player in game.players:
+		player.choice.choose()
+	for i in range(4):
+		play_turn(game)
+
+	def simulate(seed):
+		clone = deepcopy(game)
+		clone.random.seed(seed)
+		try:
+			for i in range(2):
+				play_turn(clone)
+		except GameOver:
+			pass
+		refs = [weakref.ref(entity) for entity in clone]
+		clone.dispose()
+		return refs
+
+	# Searches run with logging off. Log records kept by a handler, such as
+	# pytest's log capture, would refer to the clones and keep them alive.
+	simulation_mode()
+	gc.collect()
+	gc.disable()
+	try:
+		# Disposed clones are freed without the cycle collector
+		refs = simulate(0)
+		assert refs and not any(ref() for ref in refs)
+		del refs
+		for seed in range(1, simulations // 2):
+			simulate(seed)
+		objects = len(gc.get_objects())
+		for seed in range(simulations // 2, simulations):
+			simulate(seed)
+		assert len(gc.get_objects()) - objects < 100
+		assert gc.collect() == 0
+	finally:
+		gc.enable()
+		simulation_mode(False)
+
+	assert not game.ended
+
+
+def test_shuffle_deck_views():
+	game = prepare_game()
+	player1, player2 = game.players
+	assert list(game.decks) == player1.deck + player2.deck
+	player1.shuffle_deck()
+	assert list(game.decks) == player1.deck + player2.deck
+	assert list(game.hands) == player1.hand + player2.hand
+	player2.shuffle_hand()
+	assert list(game.hands) == player1.hand + player2.hand
@@ -1,13 +1,15 @@
+import os
 import random
 
 from hearthstone.enums import *
 
 import fireplace.cards
 from fireplace.brawls import *
+from fireplace.exceptions import GameOver
 from fireplace.game import BaseGame, CoinRules, Game
 from fireplace.logging import log
 from fireplace.player import Player
-from fireplace.utils import random_draft
+from fireplace.utils import play_turn, random_draft
 
 
 # Token minions
@@ -59,6 +61,24 @@ def _draft(card_class, exclude):
 
 _heroes = fireplace.cards.filter(collectible=True, type=CardType.HERO)
 
+# FIREPLACE_AURAS=full runs the suite against the full aura refresh
+# (see BaseGame.incremental_auras), to check both give the same results
+if os.environ.get("FIREPLACE_AURAS") == "full":
+	BaseGame.incremental_auras = False
+
+# Check every death check queued by the engine against a full scan
+BaseGame.check_all_deaths = True
+
+# FIREPLACE_CHECK_ATTRIBUTES=1 compares every cached entity attribute
+# read with the uncached value
+if os.environ.get("FIREPLACE_CHECK_ATTRIBUTES"):
+	BaseGame.check_attribute_cache = True
+
+
+# FIREPLACE_TEMPLATES=1 sets up every game from a GameTemplate
+if os.environ.get("FIREPLACE_TEMPLATES"):
+	BaseGame.use_templates = True
+
 
 class BaseTestGame(CoinRules, BaseGame):
 	def start(self):
@@ -112,3 +132,29 @@ def prepare_empty_game(class1=None, class2=None, game_class=BaseTestGame):
 	_empty_mulligan(game)
 
 	return game
+
+
+def play_until_turn(game, turn):
+	"""
+	Plays random turns until \a turn or the end of \a game
+	"""
+	try:
+		while game.turn < turn and not game.ended:
+			play_turn(game)
+	except GameOver:
+		pass
+	return game
+
+
+def game_state(game):
+	"""
+	Returns the turn, the playstates and the state of every card of \a game,
+	to check that two games played out the same
+	"""
+	return game.turn, [player.playstate for player in game.players], [
+		(
+			entity.entity_id, entity.id, entity.zone, getattr(entity, "health", None),
+			getattr(entity, "atk", None), entity.cost, len(entity.buffs),
+		)
+		for entity in game if entity.is_card
+	]